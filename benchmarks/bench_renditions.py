@@ -0,0 +1,50 @@
+"""Bytes sent per reply: original GIF vs. the rendition selector.
+
+Usage:
+    python benchmarks/bench_renditions.py [search_response.json ...]
+
+Each file is a saved Giphy /v1/gifs/search response. Without arguments the
+bundled sample in benchmarks/data is used.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from renditions import QUALITY_TARGETS, rendition_size, select_rendition  # noqa: E402
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "giphy_search_sample.json")
+
+
+def load_gifs(paths):
+    gifs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            gifs.extend(json.load(f)["data"])
+    return gifs
+
+
+def main(argv):
+    gifs = load_gifs(argv or [SAMPLE])
+    if not gifs:
+        print("No GIFs in input.")
+        return 1
+
+    baseline = sum(rendition_size(gif, None) for gif in gifs) / len(gifs)
+    print(f"{len(gifs)} GIFs\n")
+    print(f"{'target':<10}{'avg bytes/reply':>18}{'vs original':>14}{'mp4 share':>12}{'select µs':>12}")
+    print(f"{'original':<10}{baseline:>18,.0f}{'100.0%':>14}{'0.0%':>12}{'-':>12}")
+    for quality in QUALITY_TARGETS:
+        start = time.perf_counter()
+        picks = [select_rendition(gif, quality) for gif in gifs]
+        elapsed = (time.perf_counter() - start) / len(gifs) * 1e6
+        average = sum(p.size for p in picks) / len(picks)
+        mp4_share = sum(p.format == "mp4" for p in picks) / len(picks)
+        print(f"{quality:<10}{average:>18,.0f}{average / baseline:>14.1%}{mp4_share:>12.1%}{elapsed:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,283 @@
+"""Local stand-in for the Telegram Bot API.
+
+Hands out injected updates through getUpdates (with long polling), or,
+once the bot has called setWebhook, POSTs them to the webhook URL with
+its secret token the way Telegram does. Records every reply the bot
+sends. Latency of the Bot API itself is configurable. Point the bot at it
+with TELEGRAM_API_URL.
+"""
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from collections import Counter, defaultdict, deque
+from email.parser import BytesParser
+from email.policy import default
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BOT_USER = {"id": 100000, "is_bot": True, "first_name": "GIF Bot", "username": "fake_gif_bot"}
+
+# Methods that end the handling of one user message.
+REPLY_METHODS = ("sendAnimation", "sendMessage", "sendMediaGroup", "sendPhoto", "sendVideo")
+
+# Webhook deliveries go straight to the bot, never through an HTTP proxy.
+WEBHOOK_OPENER = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+class FakeBotAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.02):
+        super().__init__(address, FakeBotAPIHandler)
+        self.latency = latency
+        self.cond = threading.Condition()
+        self.updates: "deque[dict]" = deque()
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.calls = Counter()
+        # chat_id -> enqueue times of messages still waiting for a reply
+        self.pending = defaultdict(deque)
+        self.latencies: "list[float]" = []
+        self.replies: "list[tuple]" = []
+        # (url, secret_token) while a webhook is set, else None
+        self.webhook = None
+        self.deliverers = 0
+        self.delivery_errors = 0
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response (e.g. the bot shutting down during
+        # a long poll) are expected and not worth a traceback.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # ---- driving side ----
+
+    def inject_message(self, chat_id: int, text: str, chat_type: str = "private"):
+        with self.cond:
+            message_id = self.next_message_id
+            self.next_message_id += 1
+            update = {
+                "update_id": self.next_update_id,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": chat_type},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+                    "text": text,
+                },
+            }
+            self.next_update_id += 1
+            self.updates.append(update)
+            self.pending[chat_id].append(time.perf_counter())
+            self.cond.notify_all()
+
+    def outstanding(self) -> int:
+        with self.cond:
+            return sum(len(times) for times in self.pending.values())
+
+    def wait_idle(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while any(self.pending.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    # ---- webhook delivery ----
+
+    def set_webhook(self, url: str, secret_token=None, max_connections: int = 40):
+        with self.cond:
+            self.webhook = (url, secret_token)
+            missing = max(0, max_connections - self.deliverers)
+            self.deliverers += missing
+            self.cond.notify_all()
+        for _ in range(missing):
+            threading.Thread(target=self.deliver_updates, daemon=True).start()
+
+    def delete_webhook(self):
+        with self.cond:
+            self.webhook = None
+
+    def deliver_updates(self):
+        """Deliver queued updates to the webhook, one at a time, forever."""
+        while True:
+            with self.cond:
+                while not (self.webhook and self.updates):
+                    self.cond.wait()
+                update = self.updates.popleft()
+                url, secret_token = self.webhook
+            headers = {"Content-Type": "application/json"}
+            if secret_token:
+                headers["X-Telegram-Bot-Api-Secret-Token"] = secret_token
+            request = urllib.request.Request(url, data=json.dumps(update).encode(), headers=headers)
+            try:
+                with WEBHOOK_OPENER.open(request, timeout=30) as response:
+                    response.read()
+            except (urllib.error.URLError, OSError):
+                # Like Telegram, keep the update and try again shortly.
+                with self.cond:
+                    self.delivery_errors += 1
+                    self.updates.appendleft(update)
+                time.sleep(0.1)
+
+    # ---- bot side ----
+
+    def get_updates(self, offset: int, limit: int, timeout: float) -> list:
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self.updates and self.updates[0]["update_id"] < offset:
+                self.updates.popleft()
+            while not self.updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self.cond.wait(remaining)
+            return list(self.updates)[:limit]
+
+    def record_reply(self, method: str, chat_id: int):
+        now = time.perf_counter()
+        with self.cond:
+            times = self.pending.get(chat_id)
+            if times:
+                self.latencies.append(now - times.popleft())
+            self.replies.append((method, chat_id, now))
+            self.cond.notify_all()
+
+    def make_message(self, chat_id: int, extra: dict) -> dict:
+        with self.cond:
+            message_id = self.next_message_id
+            self.next_message_id += 1
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+        }
+        message.update(extra)
+        return message
+
+
+def decode_value(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def fake_file(reference: str, kind: str) -> dict:
+    if reference.startswith("fake-"):
+        file_id = reference
+    else:
+        file_id = f"fake-{kind}-{zlib.crc32(reference.encode()):08x}"
+    return {"file_id": file_id, "file_unique_id": file_id[-8:], "width": 200, "height": 200, "duration": 3}
+
+
+class FakeBotAPIHandler(BaseHTTPRequestHandler):
+    server: FakeBotAPI
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def params(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/json"):
+            return json.loads(body or b"{}")
+        if content_type.startswith("multipart/form-data"):
+            return self.multipart_params(content_type, body)
+        params = {}
+        for key, values in parse_qs(body.decode()).items():
+            params[key] = decode_value(values[0])
+        return params
+
+    @staticmethod
+    def multipart_params(content_type: str, body: bytes) -> dict:
+        """Form fields of an upload; file parts become "upload:<name>:<crc>"."""
+        message = BytesParser(policy=default).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        params = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            content = part.get_payload(decode=True) or b""
+            if part.get_filename():
+                params[name] = f"upload:{part.get_filename()}:{zlib.crc32(content):08x}"
+            else:
+                params[name] = decode_value(content.decode())
+        return params
+
+    def reply(self, result):
+        body = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        method = self.path.rsplit("/", 1)[-1]
+        params = self.params()
+        with server.cond:
+            server.calls[method] += 1
+
+        if method == "getUpdates":
+            self.reply(server.get_updates(
+                int(params.get("offset") or 0),
+                int(params.get("limit") or 100),
+                float(params.get("timeout") or 0),
+            ))
+            return
+
+        time.sleep(server.latency)
+        chat_id = params.get("chat_id")
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "setWebhook":
+            server.set_webhook(
+                params["url"], params.get("secret_token"), int(params.get("max_connections") or 40)
+            )
+            result = True
+        elif method == "deleteWebhook":
+            server.delete_webhook()
+            result = True
+        elif method == "sendAnimation":
+            result = server.make_message(chat_id, {"animation": fake_file(str(params.get("animation")), "anim")})
+        elif method == "sendPhoto":
+            result = server.make_message(chat_id, {"photo": [fake_file(str(params.get("photo")), "photo")]})
+        elif method == "sendMediaGroup":
+            media = params.get("media") or []
+            result = [
+                server.make_message(chat_id, {"video": fake_file(str(item.get("media")), "video")})
+                for item in media
+            ]
+        elif method in ("sendMessage", "editMessageText"):
+            result = server.make_message(chat_id, {"text": params.get("text", "")})
+        elif method == "editMessageMedia":
+            media = params.get("media") or {}
+            result = server.make_message(chat_id, {"animation": fake_file(str(media.get("media")), "anim")})
+        else:
+            result = True
+        self.reply(result)
+
+        if method in REPLY_METHODS and chat_id is not None:
+            server.record_reply(method, chat_id)
+
+
+def start(port=0, **options) -> FakeBotAPI:
+    server = FakeBotAPI(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,209 @@
+"""Local stand-in for the GIF search APIs the bot can use.
+
+Serves Giphy's /v1/gifs/search and Tenor's /v2/search with synthetic results
+built from the bundled sample response; start one instance per provider to
+give each its own latency. Latency, error rate and the share of queries that
+return nothing are configurable, keys listed in ``rejected_keys`` get HTTP
+429, and every request is counted per API key.
+
+Run standalone with:
+    python benchmarks/fake_giphy.py --port 8082 --latency 0.15
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "giphy_search_sample.json")
+
+
+class FakeGiphy(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, address, latency=0.1, jitter=0.03, error_rate=0.0, empty_rate=0.0, rejected_keys=(), seed=1,
+    ):
+        super().__init__(address, FakeGiphyHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.empty_rate = empty_rate
+        self.rejected_keys = set(rejected_keys)
+        self.random = random.Random(seed)
+        with open(SAMPLE, "r", encoding="utf-8") as f:
+            self.templates = json.load(f)["data"]
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.requests_by_key = Counter()
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response (e.g. the bot shutting down during
+        # a long poll) are expected and not worth a traceback.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/gifs/search"
+
+    @property
+    def tenor_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v2/search"
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.random.gauss(self.latency, self.jitter))
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def is_empty(self, query: str) -> bool:
+        # Deterministic per query so repeats behave the same way.
+        return zlib.crc32(query.encode()) % 10_000 < self.empty_rate * 10_000
+
+    def results(self, query: str, limit: int, offset: int) -> list:
+        if self.is_empty(query):
+            return []
+        slug = "-".join(query.split()) or "gif"
+        data = []
+        for i in range(offset, offset + limit):
+            gif = copy.deepcopy(self.templates[i % len(self.templates)])
+            gif_id = f"{slug}{i}"
+            old_id = gif["id"]
+            for image in gif["images"].values():
+                for field in ("url", "mp4"):
+                    if field in image:
+                        image[field] = image[field].replace(old_id, gif_id)
+            gif.update(id=gif_id, slug=f"{slug}-{gif_id}", title=f"{query.title()} {gif['title']}")
+            data.append(gif)
+        return data
+
+    def tenor_results(self, query: str, limit: int, offset: int) -> list:
+        """The same synthetic GIFs, shaped like Tenor v2 results."""
+        formats = {
+            "gif": ("original", "url", "size"),
+            "mp4": ("original", "mp4", "mp4_size"),
+            "loopedmp4": ("original", "mp4", "mp4_size"),
+            "mediumgif": ("downsized", "url", "size"),
+            "tinygif": ("fixed_width", "url", "size"),
+            "tinymp4": ("fixed_width", "mp4", "mp4_size"),
+            "nanogif": ("fixed_width_small", "url", "size"),
+            "nanomp4": ("fixed_width_small", "mp4", "mp4_size"),
+            "gifpreview": ("preview_gif", "url", "size"),
+        }
+        results = []
+        for gif in self.results(query, limit, offset):
+            media = {}
+            for name, (rendition, url_field, size_field) in formats.items():
+                image = gif["images"].get(rendition, {})
+                if url_field in image:
+                    media[name] = {
+                        "url": image[url_field].replace("giphy.com", "tenor.com"),
+                        "dims": [int(image["width"]), int(image["height"])],
+                        "size": int(image.get(size_field, 0)),
+                        "duration": 2.0,
+                    }
+            results.append({
+                "id": gif["id"],
+                "title": gif["title"],
+                "content_description": gif["title"],
+                "itemurl": f"https://tenor.com/view/{gif['slug']}",
+                "tags": query.split(),
+                "media_formats": media,
+            })
+        return results
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors, "by_key": dict(self.requests_by_key)}
+
+
+class FakeGiphyHandler(BaseHTTPRequestHandler):
+    server: FakeGiphy
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        api_key = params.get("api_key") or params.get("key", "")
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.requests_by_key[api_key] += 1
+        time.sleep(self.server.delay())
+
+        tenor = url.path.endswith("/v2/search")
+        if not tenor and not url.path.endswith("/gifs/search"):
+            self.reply(404, {"meta": {"status": 404, "msg": "Not Found"}})
+            return
+        if api_key in self.server.rejected_keys:
+            self.reply(429, {"meta": {"status": 429, "msg": "API rate limit exceeded"}})
+            return
+        if self.server.should_fail():
+            with self.server.lock:
+                self.server.errors += 1
+            self.reply(500, {"meta": {"status": 500, "msg": "Internal Server Error"}})
+            return
+
+        limit = int(params.get("limit", 25))
+        if tenor:
+            offset = int(params.get("pos") or 0)
+            results = self.server.tenor_results(params.get("q", ""), limit, offset)
+            self.reply(200, {"results": results, "next": str(offset + len(results)) if results else ""})
+            return
+        offset = int(params.get("offset", 0))
+        data = self.server.results(params.get("q", ""), limit, offset)
+        self.reply(200, {
+            "data": data,
+            "pagination": {"total_count": 0 if not data else 5000, "count": len(data), "offset": offset},
+            "meta": {"status": 200, "msg": "OK"},
+        })
+
+
+def start(port=0, **options) -> FakeGiphy:
+    server = FakeGiphy(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.03)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--empty-rate", type=float, default=0.0)
+    parser.add_argument("--rejected-key", action="append", default=[], help="answer this API key with 429")
+    args = parser.parse_args()
+    server = FakeGiphy(
+        ("127.0.0.1", args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        empty_rate=args.empty_rate,
+        rejected_keys=args.rejected_key,
+    )
+    print(f"Fake Giphy listening on {server.url}")
+    print(f"Fake Tenor listening on {server.tenor_url}")
+    server.serve_forever()
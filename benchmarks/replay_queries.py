@@ -0,0 +1,64 @@
+"""Replay a query log and compare cache hit rates across query keys.
+
+Usage:
+    python benchmarks/replay_queries.py queries.txt [--cache-size 2048]
+
+The log has one raw user query per line, in arrival order. Each strategy
+maps queries to cache keys and is replayed through an LRU cache of the
+given size; TTLs are ignored.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import TTLCache  # noqa: E402
+from canonical import canonicalize  # noqa: E402
+
+STRATEGIES = {
+    "verbatim": lambda q: q.strip(),
+    "lower+spaces": lambda q: " ".join(q.lower().split()),
+    "canonical": lambda q: canonicalize(q),
+    "canonical+stem": lambda q: canonicalize(q, stem=True),
+}
+
+
+def replay(queries, key_fn, cache_size):
+    cache = TTLCache(maxsize=cache_size, ttl=float("inf"))
+    keys = set()
+    for query in queries:
+        key = key_fn(query)
+        keys.add(key)
+        if cache.get(key) is None:
+            cache.set(key, True)
+    return cache.stats(), len(keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="query log, one query per line ('-' for stdin)")
+    parser.add_argument("--cache-size", type=int, default=2048)
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin if args.log == "-" else open(args.log, "r", encoding="utf-8")
+    with stream:
+        queries = [line.rstrip("\n") for line in stream if line.strip()]
+    if not queries:
+        print("Query log is empty.")
+        return 1
+
+    print(f"{len(queries)} queries, cache size {args.cache_size}\n")
+    print(f"{'strategy':<16}{'distinct keys':>15}{'hits':>9}{'hit rate':>10}{'gain':>9}")
+    baseline = None
+    for name, key_fn in STRATEGIES.items():
+        stats, distinct = replay(queries, key_fn, args.cache_size)
+        if baseline is None:
+            baseline = stats["hit_rate"]
+        gain = stats["hit_rate"] - baseline
+        print(f"{name:<16}{distinct:>15}{stats['hits']:>9}{stats['hit_rate']:>10.1%}{gain:>+9.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""End-to-end load benchmark for the bot against local fakes.
+
+Starts a fake Giphy and a fake Bot API, launches render_bot.py against them
+(polling, or webhook with --mode webhook), replays a traffic scenario and
+reports throughput, p50/p95/p99 reply latency (from message arrival at the
+Bot API to the bot's reply), upstream Giphy requests and the bot's peak RSS.
+
+Usage:
+    python benchmarks/run_load.py                       # all scenarios
+    python benchmarks/run_load.py warm bursty --rate 100 --duration 20
+    python benchmarks/run_load.py --giphy-latency 0.4 --giphy-error-rate 0.05 --json
+    python benchmarks/run_load.py cold --giphy-latency 2 --tenor-latency 0.2 --env SEARCH_HEDGE_DELAY=0.5
+    python benchmarks/run_load.py warm --mode webhook
+
+Scenarios:
+    cold    every message is a new keyword
+    warm    Zipf-distributed popular keywords, after one warm-up pass
+    bursty  waves of many chats sending the same keyword at once
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import fake_bot_api  # noqa: E402
+import fake_giphy  # noqa: E402
+
+KEYWORDS = [
+    "cat", "dog", "lol", "thanks", "yes", "no", "wow", "party", "dance", "happy",
+    "sad", "love", "omg", "hello", "bye", "fail", "win", "cry", "facepalm", "shrug",
+    "clap", "hug", "excited", "tired", "coffee", "pizza", "monday", "friday", "cool", "nope",
+    "ok", "sorry", "congrats", "birthday", "hi", "angry", "confused", "laugh", "thumbs up", "mind blown",
+    "eye roll", "popcorn", "bored", "sleep", "hungry", "good morning", "good night", "fire", "money", "panic",
+]
+
+
+# --------------------------------------
+# Traffic Scenarios
+# --------------------------------------
+# Each returns a list of (send_at_seconds, chat_id, text), sorted by time.
+def zipf_choice(rng, items, s=1.1):
+    weights = [1 / (rank ** s) for rank in range(1, len(items) + 1)]
+    return rng.choices(items, weights=weights)[0]
+
+
+def scenario_cold(rng, rate, duration, chats):
+    count = int(rate * duration)
+    return [(i / rate, rng.randrange(chats) + 1, f"unique query {i}") for i in range(count)]
+
+
+def scenario_warm(rng, rate, duration, chats):
+    warmup = [(i * 0.01, i + 1, keyword) for i, keyword in enumerate(KEYWORDS)]
+    start = len(warmup) * 0.01 + 1.0
+    count = int(rate * duration)
+    return warmup + [
+        (start + i / rate, rng.randrange(chats) + 1, zipf_choice(rng, KEYWORDS))
+        for i in range(count)
+    ]
+
+
+def scenario_bursty(rng, rate, duration, chats):
+    # One burst per second; each burst is `rate` chats sending one keyword.
+    events = []
+    for second in range(int(duration)):
+        keyword = zipf_choice(rng, KEYWORDS)
+        burst_chats = rng.sample(range(1, chats + 1), min(chats, int(rate)))
+        for j, chat_id in enumerate(burst_chats):
+            events.append((second + j * 0.001, chat_id, keyword))
+    return events
+
+
+SCENARIOS = {
+    "cold": scenario_cold,
+    "warm": scenario_warm,
+    "bursty": scenario_bursty,
+}
+
+
+# --------------------------------------
+# Runner
+# --------------------------------------
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss(pid):
+    """Peak resident set size of ``pid`` in KiB (Linux only), or None."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_scenario(name, args):
+    rng = random.Random(args.seed)
+    events = SCENARIOS[name](rng, args.rate, args.duration, args.chats)
+    giphy = fake_giphy.start(
+        latency=args.giphy_latency,
+        jitter=args.giphy_latency / 4,
+        error_rate=args.giphy_error_rate,
+        empty_rate=args.giphy_empty_rate,
+        seed=args.seed,
+    )
+    tenor = None
+    if args.tenor_latency is not None:
+        tenor = fake_giphy.start(
+            latency=args.tenor_latency,
+            jitter=args.tenor_latency / 4,
+            error_rate=args.tenor_error_rate,
+            seed=args.seed + 1,
+        )
+    bot_api = fake_bot_api.start(latency=args.api_latency)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = dict(os.environ)
+        env.update(
+            TELEGRAM_TOKEN="123456:BENCHMARK",
+            TELEGRAM_API_URL=bot_api.url,
+            GIPHY_API_KEY="benchmark",
+            GIPHY_URL=giphy.url,
+            BOT_MODE=args.mode,
+            STATE_DB_PATH=os.path.join(state_dir, "state.db"),
+            PYTHONUNBUFFERED="1",
+        )
+        env.pop("TENOR_API_KEY", None)
+        if tenor:
+            env.update(TENOR_API_KEY="benchmark", TENOR_URL=tenor.tenor_url)
+        env.pop("WEBHOOK_URL", None)
+        env.pop("RENDER_EXTERNAL_URL", None)
+        if args.mode == "webhook":
+            port = free_port()
+            env.update(
+                WEBHOOK_URL=f"http://127.0.0.1:{port}",
+                WEBHOOK_LISTEN="127.0.0.1",
+                PORT=str(port),
+                WEBHOOK_SECRET="benchmark-secret",
+            )
+        # The bot is ready once it polls or has registered its webhook.
+        ready_call = "setWebhook" if args.mode == "webhook" else "getUpdates"
+        env.update(dict(item.split("=", 1) for item in args.env))
+        log = open(os.path.join(state_dir, "bot.log"), "w")
+        bot = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, "render_bot.py")],
+            cwd=state_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while bot_api.calls[ready_call] == 0:
+                if bot.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"bot failed to start, see {log.name}")
+                time.sleep(0.05)
+
+            started = time.perf_counter()
+            for send_at, chat_id, text in events:
+                delay = started + send_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                bot_api.inject_message(chat_id, text)
+            completed = bot_api.wait_idle(args.drain_timeout)
+            finished = time.perf_counter()
+            peak_rss_kb = peak_rss(bot.pid)
+        finally:
+            bot.send_signal(signal.SIGINT)
+            try:
+                bot.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                bot.kill()
+                bot.wait()
+            log.close()
+            giphy.shutdown()
+            if tenor:
+                tenor.shutdown()
+            bot_api.shutdown()
+
+    if peak_rss_kb is None:
+        # ru_maxrss for children is the largest of all children waited for so
+        # far, so this is only exact for the first scenario.
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    replies = [method for method, _, _ in bot_api.replies]
+    latencies = bot_api.latencies
+    return {
+        "scenario": name,
+        "messages": len(events),
+        "replies": len(latencies),
+        "gif_replies": replies.count("sendAnimation"),
+        "completed": completed,
+        "throughput": len(latencies) / (finished - started) if finished > started else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "giphy_requests": giphy.requests,
+        "tenor_requests": tenor.requests if tenor else 0,
+        "bot_api_calls": sum(bot_api.calls.values()) - bot_api.calls["getUpdates"],
+        "peak_rss_mb": peak_rss_kb / 1024,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=", ".join(SCENARIOS))
+    parser.add_argument("--rate", type=float, default=50, help="messages per second (burst size for bursty)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of traffic per scenario")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--giphy-latency", type=float, default=0.15)
+    parser.add_argument("--giphy-error-rate", type=float, default=0.0)
+    parser.add_argument("--giphy-empty-rate", type=float, default=0.0)
+    parser.add_argument("--tenor-latency", type=float, default=None,
+                        help="also run a fake Tenor with this latency and hedge searches to it")
+    parser.add_argument("--tenor-error-rate", type=float, default=0.0)
+    parser.add_argument("--api-latency", type=float, default=0.02)
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling",
+                        help="how the bot receives updates from the fake Bot API")
+    parser.add_argument("--drain-timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the bot, e.g. --env SEARCH_CACHE_TTL=0")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    results = [run_scenario(name, args) for name in (args.scenarios or list(SCENARIOS))]
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return 0
+
+    header = f"{'scenario':<9}{'msgs':>7}{'replies':>9}{'gifs':>7}{'msg/s':>9}{'p50 ms':>9}{'p95 ms':>9}" \
+             f"{'p99 ms':>9}{'giphy':>8}{'tenor':>7}{'api':>7}{'rss MB':>9}"
+    print(header)
+    for r in results:
+        print(
+            f"{r['scenario']:<9}{r['messages']:>7}{r['replies']:>9}{r['gif_replies']:>7}{r['throughput']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['giphy_requests']:>8}{r['tenor_requests']:>7}"
+            f"{r['bot_api_calls']:>7}{r['peak_rss_mb']:>9.1f}"
+            + ("" if r["completed"] else "  (timed out)")
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import sys
+from collections import OrderedDict
+
+
+# --------------------------------------
+# Bloom Filter
+# --------------------------------------
+class BloomFilter:
+    """Fixed-size set membership with false positives, never false negatives.
+
+    Sized for ``capacity`` items at ``error_rate`` false positives.
+    """
+
+    __slots__ = ("bits", "hashes", "count", "_array")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._array)
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self._array)
+
+
+class RotatingBloomFilter:
+    """The last ``capacity``–2×``capacity`` items, in two Bloom filters.
+
+    Once the current filter is full it becomes the previous one and a fresh
+    filter takes over, so old items age out instead of saturating the bits.
+    """
+
+    __slots__ = ("capacity", "error_rate", "current", "previous")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = None
+
+    def add(self, item: str):
+        if self.current.count >= self.capacity:
+            self.previous, self.current = self.current, BloomFilter(self.capacity, self.error_rate)
+        self.current.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.current or (self.previous is not None and item in self.previous)
+
+    @property
+    def nbytes(self) -> int:
+        return self.current.nbytes + (self.previous.nbytes if self.previous else 0)
+
+    def __sizeof__(self) -> int:
+        previous = sys.getsizeof(self.previous) if self.previous else 0
+        return object.__sizeof__(self) + sys.getsizeof(self.current) + previous
+
+
+# --------------------------------------
+# Per-chat "Already Seen" Filters
+# --------------------------------------
+class SeenFilter:
+    """Remember roughly which GIFs each chat has recently been sent.
+
+    Every chat gets a ``RotatingBloomFilter`` of ``capacity`` items; at most
+    ``max_chats`` are kept (least recently used chats are dropped), so memory
+    is bounded by about ``max_chats`` × 2 filters. ``nbytes`` counts the
+    Python objects as well as the filter bits, which at the default sizes is
+    about twice the bits alone.
+    """
+
+    # A chat's OrderedDict slot and linked-list node, its key and allocator
+    # slack; calibrated against tracemalloc with 10,000 chats.
+    ENTRY_BYTES = 170
+
+    def __init__(self, max_chats: int = 10000, capacity: int = 200, error_rate: float = 0.01):
+        self.max_chats = max_chats
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._chats: "OrderedDict[object, RotatingBloomFilter]" = OrderedDict()
+        self.skipped = 0
+
+    def add(self, chat_id, item: str):
+        if not self.max_chats:
+            return
+        bloom = self._chats.get(chat_id)
+        if bloom is None:
+            bloom = self._chats[chat_id] = RotatingBloomFilter(self.capacity, self.error_rate)
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        bloom.add(item)
+
+    def seen(self, chat_id, item: str) -> bool:
+        bloom = self._chats.get(chat_id)
+        return bloom is not None and item in bloom
+
+    def skip(self, chat_id, item: str) -> bool:
+        """Like ``seen``, but counts a hit as a skipped repeat."""
+        if self.seen(chat_id, item):
+            self.skipped += 1
+            return True
+        return False
+
+    def nbytes(self) -> int:
+        return len(self._chats) * self.ENTRY_BYTES + sum(sys.getsizeof(bloom) for bloom in self._chats.values())
+
+    def max_bytes(self) -> int:
+        full = RotatingBloomFilter(self.capacity, self.error_rate)
+        full.previous = BloomFilter(self.capacity, self.error_rate)
+        return self.max_chats * (self.ENTRY_BYTES + sys.getsizeof(full))
+
+    def stats(self) -> dict:
+        return {
+            "chats": len(self._chats),
+            "max_chats": self.max_chats,
+            "bytes": self.nbytes(),
+            "max_bytes": self.max_bytes(),
+            "skipped": self.skipped,
+        }
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+# --------------------------------------
+# LRU + TTL Cache
+# --------------------------------------
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after a TTL.
+
+    ``ttl`` is the default lifetime; ``set`` may override it per entry.
+    With ``stale_ttl`` an entry is kept that much longer after it goes
+    stale: ``get`` ignores it, but ``lookup`` still returns it flagged as
+    not fresh so callers can serve it while refreshing.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0, stale_ttl: float = 0.0):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key: Hashable) -> Optional[tuple]:
+        """Return ``(value, fresh)`` for a live or stale entry, else None."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, fresh_until, expires_at = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        if fresh_until <= now:
+            self.stale_hits += 1
+            return value, False
+        self.hits += 1
+        return value, True
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store ``value``; a negative ``ttl`` stores it as already stale."""
+        lifetime = self.ttl if ttl is None else ttl
+        fresh_until = time.monotonic() + lifetime
+        self._data[key] = (value, fresh_until, fresh_until + self.stale_ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
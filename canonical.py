@@ -0,0 +1,42 @@
+import re
+import unicodedata
+
+# --------------------------------------
+# Query Canonicalization
+# --------------------------------------
+# "Cat", "cat!!", " CAT " and "cats 😺" should share one cache entry and one
+# upstream search. Letters, digits and combining marks are kept; punctuation,
+# symbols (including emoji) and control characters become spaces.
+_APOSTROPHES = re.compile(r"(?<=\w)['’](?=\w)")
+
+
+def _keep(char: str) -> bool:
+    return unicodedata.category(char)[0] in ("L", "N", "M") or char.isspace()
+
+
+def light_stem(word: str) -> str:
+    """Strip common English plural endings; leaves short words alone."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def canonicalize(query: str, stem: bool = False) -> str:
+    """Canonical form of a search query, used as cache key and upstream query.
+
+    Falls back to the case-folded input when nothing survives stripping
+    (e.g. an emoji-only query), since Giphy can still search for those.
+    """
+    folded = unicodedata.normalize("NFKC", query).casefold()
+    text = _APOSTROPHES.sub("", folded)
+    text = "".join(char if _keep(char) else " " for char in text)
+    words = text.split()
+    if stem:
+        words = [light_stem(word) for word in words]
+    return " ".join(words) or " ".join(folded.split())
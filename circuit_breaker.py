@@ -0,0 +1,138 @@
+import time
+from collections import deque
+from typing import Optional
+
+
+# --------------------------------------
+# Latency Tracking / Adaptive Timeouts
+# --------------------------------------
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+
+    def __init__(self, window: int = 200):
+        self._samples: "deque[float]" = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(pct / 100 * len(ordered)))
+        return ordered[index]
+
+    def timeout(
+        self,
+        default: float,
+        minimum: float = 0.5,
+        multiplier: float = 3.0,
+        pct: float = 99,
+        min_samples: int = 20,
+    ) -> float:
+        """``multiplier`` × the ``pct`` latency, clamped to [minimum, default].
+
+        Until ``min_samples`` calls have been seen the ``default`` is used.
+        """
+        if len(self._samples) < min_samples:
+            return default
+        return max(minimum, min(default, self.percentile(pct) * multiplier))
+
+
+# --------------------------------------
+# Circuit Breaker
+# --------------------------------------
+class CircuitBreaker:
+    """Stop calling an upstream that is failing or unusually slow.
+
+    Closed: calls flow. It opens after ``failure_threshold`` failures in a
+    row, or when at least half of the last ``window`` calls failed. Calls
+    slower than ``slow_call`` seconds count as failures.
+    Open: calls are refused until ``reset_timeout`` has passed.
+    Half-open: up to ``half_open_probes`` calls are let through; a success
+    closes the breaker, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        window: int = 20,
+        failure_rate: float = 0.5,
+        slow_call: Optional[float] = None,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._outcomes: "deque[bool]" = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._state = self.CLOSED
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._probes < self.half_open_probes:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """Give back a call that ended without an outcome (e.g. cancelled)."""
+        if self._state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self, latency: float = 0.0):
+        if self.slow_call is not None and latency > self.slow_call:
+            self.record_failure()
+            return
+        self._outcomes.append(True)
+        self._consecutive_failures = 0
+        if self._state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+
+    def record_failure(self):
+        self._outcomes.append(False)
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN:
+            self._open()
+            return
+        failures = self._outcomes.count(False)
+        window_full = len(self._outcomes) == self._outcomes.maxlen
+        if self._consecutive_failures >= self.failure_threshold or (
+            window_full and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._consecutive_failures = 0
+        self.times_opened += 1
@@ -0,0 +1,73 @@
+import io
+import math
+from typing import Optional
+
+from PIL import Image, ImageDraw, ImageFont, UnidentifiedImageError
+
+# --------------------------------------
+# Contact Sheet (preview grid)
+# --------------------------------------
+BACKGROUND = (24, 24, 24)
+BADGE = (0, 0, 0)
+LABEL = (255, 255, 255)
+
+
+def _font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, ImportError, OSError):
+        # Pillow without FreeType only has the small bitmap font.
+        return ImageFont.load_default()
+
+
+def first_frame(data: Optional[bytes], tile: int) -> Optional[Image.Image]:
+    """First frame of a GIF/JPEG/PNG/WebP, fitted into a ``tile`` square."""
+    if not data:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.seek(0)
+            frame = image.convert("RGB")
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+    frame.thumbnail((tile, tile))
+    return frame
+
+
+def compose_sheet(
+    images: list,
+    columns: int = 3,
+    tile: int = 200,
+    padding: int = 6,
+    format: str = "JPEG",
+    quality: int = 80,
+) -> bytes:
+    """Lay ``images`` (raw bytes, or None for a blank tile) out in a grid
+    numbered from 1 and encode it as ``format``.
+
+    CPU-bound; run it off the event loop.
+    """
+    rows = max(1, math.ceil(len(images) / columns))
+    width = columns * tile + (columns + 1) * padding
+    height = rows * tile + (rows + 1) * padding
+    sheet = Image.new("RGB", (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(sheet)
+    font = _font(max(12, tile // 7))
+
+    for number, data in enumerate(images, start=1):
+        row, column = divmod(number - 1, columns)
+        left = padding + column * (tile + padding)
+        top = padding + row * (tile + padding)
+        frame = first_frame(data, tile)
+        if frame is not None:
+            sheet.paste(frame, (left + (tile - frame.width) // 2, top + (tile - frame.height) // 2))
+
+        label = str(number)
+        x0, y0, x1, y1 = draw.textbbox((0, 0), label, font=font)
+        badge = (left, top, left + (x1 - x0) + 2 * padding, top + (y1 - y0) + 2 * padding)
+        draw.rectangle(badge, fill=BADGE)
+        draw.text((left + padding - x0, top + padding - y0), label, font=font, fill=LABEL)
+
+    out = io.BytesIO()
+    sheet.save(out, format=format, quality=quality)
+    return out.getvalue()
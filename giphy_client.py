@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from circuit_breaker import CircuitBreaker, LatencyTracker
+from key_pool import ApiKeyPool
+from ratelimit import QuotaManager
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------
+# Giphy Endpoints
+# --------------------------------------
+GIPHY_SEARCH_URL = "https://api.giphy.com/v1/gifs/search"
+
+
+# --------------------------------------
+# Async Giphy Client
+# --------------------------------------
+class GiphyClient:
+    """Async Giphy search client sharing one keep-alive connection pool.
+
+    At most ``max_concurrency`` searches hit the network at once; the rest
+    wait their turn instead of opening more sockets.
+
+    Each request's timeout follows observed latency (see
+    ``LatencyTracker.timeout``), capped at ``timeout``. While ``breaker`` is
+    open, searches fail immediately instead of waiting on a sick upstream.
+
+    Every request spends ``quota`` budget plus hourly budget of one key from
+    ``api_keys`` (``key_quota_per_hour`` each). Foreground searches queue for
+    up to ``quota_wait`` seconds; background ones never queue and leave
+    ``background_reserve`` of each key's hourly budget untouched. A key
+    answered with 429/403 is benched for ``key_cooldown`` seconds (ten times
+    that for 403) and the search is retried once with another key.
+    """
+
+    def __init__(
+        self,
+        api_keys: list,
+        search_url: str = GIPHY_SEARCH_URL,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        max_concurrency: int = 10,
+        min_timeout: float = 1.0,
+        breaker: Optional[CircuitBreaker] = None,
+        quota: Optional[QuotaManager] = None,
+        quota_wait: float = 2.0,
+        background_reserve: float = 0.1,
+        key_quota_per_hour: float = 0.0,
+        key_cooldown: float = 60.0,
+    ):
+        self.keys = ApiKeyPool(api_keys, per_hour=key_quota_per_hour)
+        self.key_cooldown = key_cooldown
+        self.search_url = search_url
+        self.max_timeout = timeout
+        self.min_timeout = min(min_timeout, timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.quota = quota or QuotaManager()
+        self.quota_wait = quota_wait
+        self.background_reserve = background_reserve
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=30.0,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def search(
+        self,
+        query: str,
+        rating: str = "pg-13",
+        limit: int = 1,
+        offset: int = 0,
+        background: bool = False,
+    ) -> Optional[list]:
+        """Return the ``data`` list for ``query``, or None if the request failed
+        or was refused by the breaker or the quota."""
+        if self.breaker.is_open:
+            self.breaker.rejected += 1
+            logger.debug(f"Giphy circuit open, skipping search for {query!r}")
+            return None
+        # Ask the breaker before spending any budget: a refused half-open
+        # search must not use up quota for a request that is never sent.
+        if not self.breaker.allow():
+            return None
+        try:
+            return await self._search(query, rating, limit, offset, background)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+
+    async def _search(self, query: str, rating: str, limit: int, offset: int, background: bool) -> Optional[list]:
+        max_wait = 0.0 if background else self.quota_wait
+        reserve = self.background_reserve if background else 0.0
+        if not await self.quota.acquire(max_wait=max_wait):
+            self.breaker.release()
+            logger.warning(f"Giphy rate limit reached, skipping search for {query!r}")
+            return None
+
+        rejected_keys = []
+        for attempt in range(2):
+            if attempt and not self.breaker.allow():
+                return None
+            try:
+                key = await self.keys.acquire(
+                    max_wait=max_wait if attempt == 0 else 0.0,
+                    reserve=reserve,
+                    exclude=rejected_keys,
+                )
+            except asyncio.CancelledError:
+                if attempt == 0:
+                    self.quota.refund()
+                raise
+            if key is None:
+                # Only the first attempt's upstream budget is still unspent.
+                if attempt == 0:
+                    self.quota.refund()
+                self.breaker.release()
+                logger.warning(f"Giphy quota exhausted on all keys, skipping search for {query!r}")
+                return None
+
+            params = {
+                "api_key": key.value,
+                "q": query,
+                "limit": limit,
+                "offset": offset,
+                "rating": rating,
+            }
+            key.requests += 1
+            # Half-open probes get the full timeout: if Giphy has slowed down
+            # since the latency window settled, the adaptive one would time
+            # every probe out and keep the breaker from ever closing.
+            probing = self.breaker.state == CircuitBreaker.HALF_OPEN
+            timeout = httpx.Timeout(self.max_timeout, connect=min(self.max_timeout, 5.0)) if probing else self.timeout()
+            try:
+                async with self._semaphore:
+                    started = time.monotonic()
+                    response = await self._client.get(self.search_url, params=params, timeout=timeout)
+                    elapsed = time.monotonic() - started
+                if response.status_code in (403, 429):
+                    # Giphy is up but refuses this key; bench the key, not the upstream.
+                    self.breaker.record_success()
+                    self.keys.bench(key, self._cooldown(response))
+                    rejected_keys.append(key)
+                    logger.warning(f"Giphy key {key.label} got HTTP {response.status_code}, benched")
+                    continue
+                if 400 <= response.status_code < 500:
+                    # Giphy is up but refuses this request (e.g. 414 for an
+                    # over-long query); only 5xx and network errors trip the breaker.
+                    self.breaker.record_success()
+                    logger.warning(f"Giphy search for {query!r} got HTTP {response.status_code}")
+                    return None
+                response.raise_for_status()
+                data = response.json()["data"]
+            except Exception as e:
+                key.errors += 1
+                if isinstance(e, httpx.TimeoutException):
+                    # A timed-out call took at least this long; counting it
+                    # lets the adaptive timeout grow when Giphy slows down.
+                    self.latency.record(timeout.read)
+                self.breaker.record_failure()
+                logger.error(f"Error fetching GIF: {e!r}")
+                return None
+            self.latency.record(elapsed)
+            self.breaker.record_success(elapsed)
+            return data
+        return None
+
+    def _cooldown(self, response: httpx.Response) -> float:
+        if response.status_code == 403:
+            return self.key_cooldown * 10
+        try:
+            return max(1.0, float(response.headers.get("Retry-After", "")))
+        except ValueError:
+            return self.key_cooldown
+
+    def timeout(self) -> httpx.Timeout:
+        total = self.latency.timeout(self.max_timeout, minimum=self.min_timeout)
+        return httpx.Timeout(total, connect=min(total, 5.0))
+
+    def stats(self) -> dict:
+        p50, p99 = self.latency.percentile(50), self.latency.percentile(99)
+        return {
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "rejected": self.breaker.rejected,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p99_ms": p99 * 1000 if p99 is not None else None,
+            "timeout_s": self.timeout().read,
+            "remaining_hourly": self.keys.remaining_hourly(),
+            "delayed": self.quota.delayed,
+            "throttled": self.quota.throttled + self.keys.throttled,
+            "keys": self.keys.stats(),
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,88 @@
+import time
+from typing import Optional
+
+from ratelimit import QuotaManager
+
+
+# --------------------------------------
+# API Key Pool
+# --------------------------------------
+class ApiKey:
+    def __init__(self, value: str, per_hour: float = 0.0):
+        self.value = value
+        self.quota = QuotaManager(per_hour=per_hour)
+        self.requests = 0
+        self.errors = 0
+        self.rejections = 0
+        self.benched_until = 0.0
+
+    @property
+    def label(self) -> str:
+        """Key shown in logs and /stats without revealing it."""
+        if len(self.value) <= 8:
+            return "…" + self.value[-2:]
+        return f"{self.value[:4]}…{self.value[-4:]}"
+
+    @property
+    def benched(self) -> bool:
+        return time.monotonic() < self.benched_until
+
+    def remaining(self) -> float:
+        return self.quota.per_hour.tokens
+
+    def stats(self) -> dict:
+        remaining = self.quota.remaining_hourly()
+        return {
+            "key": self.label,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejections": self.rejections,
+            "remaining_hourly": remaining,
+            "benched_for": max(0.0, self.benched_until - time.monotonic()),
+        }
+
+
+class ApiKeyPool:
+    """Spread requests over several API keys by remaining hourly budget.
+
+    Keys the upstream rejects (429/403) are benched for a while and skipped.
+    """
+
+    def __init__(self, keys: list, per_hour: float = 0.0):
+        if not keys:
+            raise ValueError("at least one API key is required")
+        self.keys = [ApiKey(value, per_hour) for value in dict.fromkeys(keys)]
+        self.throttled = 0
+
+    def candidates(self) -> list:
+        active = [key for key in self.keys if not key.benched]
+        return sorted(active, key=lambda key: (-key.remaining(), key.requests))
+
+    async def acquire(self, max_wait: float = 0.0, reserve: float = 0.0, exclude=()) -> Optional[ApiKey]:
+        """Pick a key with budget left, waiting up to ``max_wait`` for one.
+
+        ``reserve`` is a share (0–1) of each key's hourly budget to keep back.
+        """
+        candidates = [key for key in self.candidates() if key not in exclude]
+        for key in candidates:
+            if await key.quota.acquire(0.0, reserve * key.quota.per_hour.capacity):
+                return key
+        if max_wait > 0 and candidates:
+            soonest = min(candidates, key=lambda key: key.quota.per_hour.wait_time())
+            if await soonest.quota.acquire(max_wait, reserve * soonest.quota.per_hour.capacity):
+                return soonest
+        self.throttled += 1
+        return None
+
+    def bench(self, key: ApiKey, seconds: float):
+        key.rejections += 1
+        key.benched_until = max(key.benched_until, time.monotonic() + seconds)
+
+    def remaining_hourly(self) -> Optional[int]:
+        remaining = [key.quota.remaining_hourly() for key in self.keys if not key.benched]
+        if any(value is None for value in remaining):
+            return None
+        return sum(remaining)
+
+    def stats(self) -> list:
+        return [key.stats() for key in self.keys]
@@ -0,0 +1,386 @@
+import asyncio
+import hashlib
+import logging
+import math
+import mmap
+import re
+import os
+import struct
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from canonical import canonicalize
+from providers import SearchProvider
+
+logger = logging.getLogger(__name__)
+
+MEDIA_EXTENSIONS = {".gif": "gif", ".mp4": "mp4"}
+INDEX_NAME = ".gifindex"
+
+# --------------------------------------
+# On-disk Index Layout
+# --------------------------------------
+# header | docs | terms (sorted) | postings (u32 doc ids) | strings (utf-8)
+# Everything is fixed-width except the strings blob, so lookups binary-search
+# the memory-mapped terms table without parsing the file.
+MAGIC = b"GIFIDX01"
+HEADER = struct.Struct("<8s32sIII")  # magic, signature, docs, terms, postings
+DOC = struct.Struct("<IIIIQ")  # path off/len, title off/len, size
+TERM = struct.Struct("<IIII")  # term off/len, postings start/count
+
+
+def _tokens(text: str) -> set:
+    return set(canonicalize(text.replace("_", " ").replace("-", " "), stem=True).split())
+
+
+def rank(tokens: set, postings, limit: int, min_overlap: float) -> list:
+    """Doc ids from ``postings(token)`` ranked by how many ``tokens`` they match."""
+    if not tokens:
+        return []
+    scores = {}
+    for token in tokens:
+        for doc_id in postings(token):
+            scores[doc_id] = scores.get(doc_id, 0) + 1
+    needed = max(1, math.ceil(len(tokens) * min_overlap))
+    ranked = sorted((doc_id for doc_id, score in scores.items() if score >= needed),
+                    key=lambda doc_id: (-scores[doc_id], doc_id))
+    return ranked[:limit]
+
+
+def scan(directory: str) -> list:
+    """Media files under ``directory`` as sorted (relpath, size, mtime_ns, sidecar)."""
+    found = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in MEDIA_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            sidecar = os.path.join(root, stem + ".txt")
+            stat = os.stat(path)
+            sidecar_mtime = os.stat(sidecar).st_mtime_ns if os.path.exists(sidecar) else 0
+            found.append((
+                os.path.relpath(path, directory),
+                stat.st_size,
+                max(stat.st_mtime_ns, sidecar_mtime),
+                sidecar if sidecar_mtime else None,
+            ))
+    return sorted(found)
+
+
+def signature(entries: list) -> bytes:
+    digest = hashlib.sha256()
+    for relpath, size, mtime, _ in entries:
+        digest.update(f"{relpath}\0{size}\0{mtime}\n".encode())
+    return digest.digest()
+
+
+def read_sidecar(path: Optional[str], relpath: str) -> tuple:
+    """(title, searchable text) for a media file.
+
+    The sidecar's first line is the title; the rest are tags (commas or
+    whitespace). Without a sidecar the file name is used.
+    """
+    fallback = os.path.splitext(os.path.basename(relpath))[0].replace("_", " ").replace("-", " ")
+    if not path:
+        return fallback, fallback
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    title = lines[0].strip() if lines and lines[0].strip() else fallback
+    tags = " ".join(lines[1:]).replace(",", " ")
+    return title, f"{title} {tags} {fallback}"
+
+
+def build_index(directory: str, index_path: str, entries: Optional[list] = None):
+    entries = scan(directory) if entries is None else entries
+    strings = bytearray()
+
+    def intern(text: str) -> tuple:
+        data = text.encode("utf-8")
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    docs, postings_by_term = [], {}
+    for doc_id, (relpath, size, _, sidecar) in enumerate(entries):
+        title, text = read_sidecar(sidecar, relpath)
+        docs.append(DOC.pack(*intern(relpath), *intern(title), size))
+        for token in _tokens(text):
+            postings_by_term.setdefault(token, []).append(doc_id)
+
+    terms, postings = [], []
+    for term in sorted(postings_by_term, key=lambda t: t.encode("utf-8")):
+        ids = postings_by_term[term]
+        terms.append(TERM.pack(*intern(term), len(postings), len(ids)))
+        postings.extend(ids)
+
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, signature(entries), len(docs), len(terms), len(postings)))
+        f.writelines(docs)
+        f.writelines(terms)
+        f.write(struct.pack(f"<{len(postings)}I", *postings))
+        f.write(strings)
+    os.replace(tmp_path, index_path)
+    logger.info(f"Indexed {len(docs)} local GIFs ({len(terms)} terms) into {index_path}")
+
+
+# --------------------------------------
+# Memory-mapped Index
+# --------------------------------------
+class LocalIndex:
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.signature, self.docs, self.terms, postings = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a GIF index")
+        self._docs_at = HEADER.size
+        self._terms_at = self._docs_at + self.docs * DOC.size
+        self._postings_at = self._terms_at + self.terms * TERM.size
+        self._strings_at = self._postings_at + postings * 4
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings_at + offset
+        return self._mm[start:start + length]
+
+    def postings(self, term: str) -> list:
+        target = term.encode("utf-8")
+        lo, hi = 0, self.terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off, length, start, count = TERM.unpack_from(self._mm, self._terms_at + mid * TERM.size)
+            candidate = self._string(off, length)
+            if candidate < target:
+                lo = mid + 1
+            elif candidate > target:
+                hi = mid
+            else:
+                return list(struct.unpack_from(f"<{count}I", self._mm, self._postings_at + start * 4))
+        return []
+
+    def doc(self, doc_id: int) -> tuple:
+        """(relpath, title, size) of ``doc_id``."""
+        path_off, path_len, title_off, title_len, size = DOC.unpack_from(
+            self._mm, self._docs_at + doc_id * DOC.size
+        )
+        return (
+            self._string(path_off, path_len).decode("utf-8"),
+            self._string(title_off, title_len).decode("utf-8"),
+            size,
+        )
+
+    def search(self, query: str, limit: int = 1, min_overlap: float = 0.5) -> list:
+        """Doc ids ranked by how many query tokens they match.
+
+        Docs must match at least ``min_overlap`` of the tokens; ties keep
+        index order so results are stable.
+        """
+        return rank(_tokens(query), self.postings, limit, min_overlap)
+
+
+# --------------------------------------
+# Local Library Provider
+# --------------------------------------
+class LocalLibraryProvider(SearchProvider):
+    """Answer searches from a local directory of GIF/MP4 files.
+
+    The index lives next to the files (``.gifindex``) unless ``index_path``
+    says otherwise, e.g. for a read-only library. It is built and mapped on
+    the first search, and rebuilt then if the directory's contents changed
+    since it was written; files added later are only picked up after a
+    restart. After a failed load, searches return None without retrying for
+    ``retry_interval`` seconds, doubling on each failure up to an hour.
+
+    Results are Giphy-shaped with ``"local": True`` and file paths as URLs;
+    send them as uploads, not by URL.
+    """
+
+    name = "local"
+
+    MAX_RETRY_INTERVAL = 3600.0
+
+    def __init__(
+        self,
+        directory: str,
+        index_path: Optional[str] = None,
+        min_overlap: float = 0.5,
+        retry_interval: float = 30.0,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.index_path = os.path.abspath(index_path or os.path.join(self.directory, INDEX_NAME))
+        self.min_overlap = min_overlap
+        self.retry_interval = retry_interval
+        self._index: Optional[LocalIndex] = None
+        self._loading: Optional[asyncio.Future] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self.lookups = 0
+        self.hits = 0
+
+    def load(self) -> LocalIndex:
+        entries = scan(self.directory)
+        current = signature(entries)
+        index = None
+        if os.path.exists(self.index_path):
+            try:
+                index = LocalIndex(self.index_path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Rebuilding unreadable local index: {e}")
+        if index is None or index.signature != current:
+            if index:
+                index.close()
+            build_index(self.directory, self.index_path, entries)
+            index = LocalIndex(self.index_path)
+        if self._index:
+            self._index.close()
+        self._index = index
+        return index
+
+    @property
+    def index(self) -> LocalIndex:
+        return self._index or self.load()
+
+    def gif(self, doc_id: int) -> dict:
+        relpath, title, size = self.index.doc(doc_id)
+        path = os.path.join(self.directory, relpath)
+        image = {"width": "0", "height": "0"}
+        if MEDIA_EXTENSIONS[os.path.splitext(relpath)[1].lower()] == "mp4":
+            image.update(mp4=path, mp4_size=str(size))
+        else:
+            image.update(url=path, size=str(size))
+        return {"id": f"local:{relpath}", "title": title, "local": True, "images": {"original": image}}
+
+    def lookup(self, query: str, limit: int = 1) -> list:
+        self.lookups += 1
+        doc_ids = self.index.search(query, limit=limit, min_overlap=self.min_overlap)
+        if doc_ids:
+            self.hits += 1
+        return [self.gif(doc_id) for doc_id in doc_ids]
+
+    async def search(self, query, rating="pg-13", limit=1, offset=0, background=False):
+        if self._index is None:
+            if self._loading is None and time.monotonic() < self._retry_at:
+                return None
+            # Scanning and (re)building can take a while on big libraries:
+            # do it once, off the event loop, however many searches wait on it.
+            if self._loading is None:
+                self._loading = asyncio.ensure_future(asyncio.to_thread(self.load))
+            loading = self._loading
+            try:
+                await asyncio.shield(loading)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._loading is loading:
+                    self._loading = None
+                    self._failures += 1
+                    backoff = min(self.MAX_RETRY_INTERVAL, self.retry_interval * 2 ** (self._failures - 1))
+                    self._retry_at = time.monotonic() + backoff
+                    logger.error(
+                        f"Could not load local GIF library {self.directory}, retrying in {backoff:.0f}s: {e!r}"
+                    )
+                return None
+            self._failures = 0
+        # Lookups themselves are sub-millisecond reads of the mapped index.
+        return self.lookup(query, limit=offset + limit)[offset:]
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "docs": index.docs if index else None,
+            "terms": index.terms if index else None,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+    async def aclose(self):
+        if self._index:
+            self._index.close()
+            self._index = None
+
+
+# --------------------------------------
+# Harvested Metadata Index
+# --------------------------------------
+# Words in nearly every Giphy title ("Cat GIF by Originals") that say nothing
+# about the GIF itself.
+HARVEST_STOPWORDS = {"gif", "by", "the", "a", "an", "and", "of", "sticker", "animated"}
+
+
+def metadata_tokens(gif: dict) -> set:
+    """Searchable tokens from a GIF's title, slug and tags."""
+    slug = (gif.get("slug") or "").rstrip("/").rsplit("/", 1)[-1]
+    gif_id = str(gif.get("id", "")).split(":", 1)[-1]
+    if gif_id and slug.endswith(gif_id):
+        slug = slug[:-len(gif_id)]
+    text = " ".join([gif.get("title") or "", slug, " ".join(gif.get("tags") or [])])
+    return {token for token in _tokens(text) if token not in HARVEST_STOPWORDS and not re.search(r"\d", token)}
+
+
+class MetadataIndex:
+    """In-memory inverted index over GIFs seen in upstream results.
+
+    Holds at most ``maxsize`` GIFs; the least recently added are dropped
+    first. Ranking matches ``LocalIndex.search``.
+    """
+
+    def __init__(self, maxsize: int = 20000):
+        self.maxsize = maxsize
+        self._gifs: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (gif, tokens)
+        self._postings: dict = {}  # token -> set of ids
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._gifs)
+
+    def add(self, gifs: list):
+        for gif in gifs:
+            gif_id = gif.get("id")
+            if not gif_id:
+                continue
+            if gif_id in self._gifs:
+                self._gifs.move_to_end(gif_id)
+                continue
+            tokens = metadata_tokens(gif)
+            if not tokens:
+                continue
+            self._gifs[gif_id] = (gif, tokens)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(gif_id)
+            if len(self._gifs) > self.maxsize:
+                self._evict()
+
+    def _evict(self):
+        gif_id, (_, tokens) = self._gifs.popitem(last=False)
+        for token in tokens:
+            ids = self._postings[token]
+            ids.discard(gif_id)
+            if not ids:
+                del self._postings[token]
+
+    def search(self, query: str, limit: int = 1, min_overlap: float = 1.0, min_results: int = 1) -> list:
+        """Best GIFs for ``query``, or none if fewer than ``min_results`` match."""
+        self.lookups += 1
+        ids = rank(_tokens(query), lambda token: self._postings.get(token, ()), limit, min_overlap)
+        if len(ids) < max(1, min_results):
+            return []
+        self.hits += 1
+        return [self._gifs[gif_id][0] for gif_id in ids]
+
+    def stats(self) -> dict:
+        return {
+            "gifs": len(self._gifs),
+            "maxsize": self.maxsize,
+            "terms": len(self._postings),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
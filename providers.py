@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import httpx
+
+from circuit_breaker import CircuitBreaker, LatencyTracker
+from giphy_client import GiphyClient
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------
+# Search Provider Interface
+# --------------------------------------
+class SearchProvider(ABC):
+    """A source of GIF search results.
+
+    Results are lists of Giphy-shaped GIF objects (``id``, ``title``,
+    ``images`` with Giphy rendition names) so the rest of the bot does not
+    care where they came from. ``None`` means the search failed.
+    """
+
+    name = "provider"
+
+    @abstractmethod
+    async def search(
+        self,
+        query: str,
+        rating: str = "pg-13",
+        limit: int = 1,
+        offset: int = 0,
+        background: bool = False,
+    ) -> Optional[list]:
+        ...
+
+    def available(self) -> bool:
+        return True
+
+    def stats(self) -> dict:
+        return {}
+
+    async def aclose(self):
+        pass
+
+
+# --------------------------------------
+# Giphy
+# --------------------------------------
+class GiphyProvider(SearchProvider):
+    name = "giphy"
+
+    def __init__(self, client: GiphyClient):
+        self.client = client
+
+    async def search(self, query, rating="pg-13", limit=1, offset=0, background=False):
+        return await self.client.search(query, rating=rating, limit=limit, offset=offset, background=background)
+
+    def available(self) -> bool:
+        return not self.client.breaker.is_open
+
+    def stats(self) -> dict:
+        return self.client.stats()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# --------------------------------------
+# Tenor (v2)
+# --------------------------------------
+TENOR_SEARCH_URL = "https://tenor.googleapis.com/v2/search"
+
+# Giphy rating -> Tenor content filter
+TENOR_CONTENT_FILTERS = {"g": "high", "pg": "high", "pg-13": "medium", "r": "off"}
+
+# Tenor media formats -> Giphy rendition names (gif format, mp4 format)
+TENOR_RENDITIONS = {
+    "original": ("gif", "mp4"),
+    "downsized": ("mediumgif", "loopedmp4"),
+    "fixed_width": ("tinygif", "tinymp4"),
+    "fixed_width_small": ("nanogif", "nanomp4"),
+    "fixed_width_still": ("gifpreview", None),
+}
+
+
+def tenor_to_giphy(result: dict) -> dict:
+    formats = result.get("media_formats", {})
+    images = {}
+    for name, (gif_format, mp4_format) in TENOR_RENDITIONS.items():
+        image = {}
+        gif, mp4 = formats.get(gif_format), formats.get(mp4_format) if mp4_format else None
+        reference = gif or mp4
+        if not reference:
+            continue
+        dims = reference.get("dims") or [0, 0]
+        image["width"], image["height"] = str(dims[0]), str(dims[1])
+        if gif:
+            image.update(url=gif["url"], size=str(gif.get("size", 0)))
+        if mp4:
+            image.update(mp4=mp4["url"], mp4_size=str(mp4.get("size", 0)))
+        images[name] = image
+    return {
+        "id": f"tenor:{result['id']}",
+        "title": result.get("content_description") or result.get("title") or "",
+        "slug": result.get("itemurl", ""),
+        "tags": result.get("tags", []),
+        "images": images,
+    }
+
+
+class TenorProvider(SearchProvider):
+    name = "tenor"
+
+    def __init__(
+        self,
+        api_key: str,
+        search_url: str = TENOR_SEARCH_URL,
+        timeout: float = 5.0,
+        client_key: str = "telegram-gif-bot",
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.api_key = api_key
+        self.search_url = search_url
+        self.client_key = client_key
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=30.0),
+        )
+
+    async def search(self, query, rating="pg-13", limit=1, offset=0, background=False):
+        if not self.breaker.allow():
+            return None
+        params = {
+            "key": self.api_key,
+            "client_key": self.client_key,
+            "q": query,
+            "limit": limit,
+            "contentfilter": TENOR_CONTENT_FILTERS.get(rating, "medium"),
+            "media_filter": ",".join(f for pair in TENOR_RENDITIONS.values() for f in pair if f),
+        }
+        if offset:
+            # Tenor paginates with an opaque "pos" token; numeric offsets are accepted.
+            params["pos"] = str(offset)
+        try:
+            started = time.monotonic()
+            response = await self._client.get(self.search_url, params=params)
+            elapsed = time.monotonic() - started
+            response.raise_for_status()
+            data = [tenor_to_giphy(result) for result in response.json()["results"]]
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Error fetching GIF from Tenor: {e!r}")
+            return None
+        self.latency.record(elapsed)
+        self.breaker.record_success(elapsed)
+        return data
+
+    def available(self) -> bool:
+        return not self.breaker.is_open
+
+    def stats(self) -> dict:
+        p50 = self.latency.percentile(50)
+        return {"breaker": self.breaker.state, "p50_ms": p50 * 1000 if p50 is not None else None}
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+# --------------------------------------
+# Hedged Search
+# --------------------------------------
+class HedgedSearch(SearchProvider):
+    """Ask ``primary`` first; if it has not answered within ``hedge_delay``
+    (or failed), also ask the next provider. The first successful answer
+    wins and the rest are cancelled.
+
+    Background searches (cache refreshes) are never hedged.
+    """
+
+    name = "hedged"
+
+    def __init__(self, primary: SearchProvider, secondaries: list, hedge_delay: float = 1.0):
+        self.providers = [primary] + list(secondaries)
+        self.hedge_delay = hedge_delay
+        self.hedged = 0
+        self.wins = {provider.name: 0 for provider in self.providers}
+
+    async def search(self, query, rating="pg-13", limit=1, offset=0, background=False):
+        candidates = [p for p in self.providers if p.available()] or self.providers[:1]
+        if background or len(candidates) == 1:
+            provider = candidates[0]
+            return await provider.search(query, rating, limit, offset, background)
+
+        pending = set()
+        owners = {}
+
+        def launch(provider):
+            task = asyncio.ensure_future(provider.search(query, rating, limit, offset))
+            owners[task] = provider
+            pending.add(task)
+
+        remaining = list(candidates)
+        launch(remaining.pop(0))
+        try:
+            while pending:
+                timeout = self.hedge_delay if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    if task.result() is not None:
+                        self.wins[owners[task].name] += 1
+                        return task.result()
+                if remaining and not done:
+                    # Nothing answered within the hedge delay: hedge.
+                    self.hedged += 1
+                    launch(remaining.pop(0))
+                elif remaining and not pending:
+                    # Every attempt so far failed: fail over right away.
+                    launch(remaining.pop(0))
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def available(self) -> bool:
+        return any(provider.available() for provider in self.providers)
+
+    def stats(self) -> dict:
+        return {"hedged": self.hedged, "wins": dict(self.wins)}
+
+    async def aclose(self):
+        for provider in self.providers:
+            await provider.aclose()
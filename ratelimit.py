@@ -0,0 +1,110 @@
+import asyncio
+import math
+import time
+from typing import Optional
+
+
+# --------------------------------------
+# Token Bucket
+# --------------------------------------
+class TokenBucket:
+    """Token bucket that hands out tokens by reservation.
+
+    ``reserve`` debits a token straight away and returns how long the caller
+    must wait for it; the balance may go negative, which queues callers in
+    arrival order without a lock. A ``rate`` of 0 means unlimited.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        if self.unlimited:
+            return math.inf
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, reserve: float = 0.0) -> float:
+        """Seconds until a token is free while keeping ``reserve`` tokens back."""
+        if self.unlimited:
+            return 0.0
+        deficit = 1.0 + reserve - self.tokens
+        return max(0.0, deficit / self.rate)
+
+    def reserve(self) -> float:
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        self._tokens -= 1.0
+        return max(0.0, -self._tokens / self.rate)
+
+    def refund(self):
+        if not self.unlimited:
+            self._tokens = min(self.capacity, self._tokens + 1.0)
+
+
+# --------------------------------------
+# Upstream Quota (per second + per hour)
+# --------------------------------------
+class QuotaManager:
+    """Shared per-second and per-hour request budget for one upstream."""
+
+    def __init__(self, per_second: float = 0.0, per_hour: float = 0.0, burst: Optional[float] = None):
+        self.per_second = TokenBucket(per_second, burst)
+        self.per_hour = TokenBucket(per_hour / 3600.0, per_hour) if per_hour > 0 else TokenBucket(0)
+        self.granted = 0
+        self.delayed = 0
+        self.throttled = 0
+
+    async def acquire(self, max_wait: float = 0.0, reserve: float = 0.0) -> bool:
+        """Wait up to ``max_wait`` seconds for budget; False if it would take longer.
+
+        ``reserve`` hourly tokens are kept back, so low-priority work such as
+        background refreshes cannot use up the last of the budget.
+        """
+        wait = max(self.per_second.wait_time(), self.per_hour.wait_time(reserve))
+        if wait > max_wait:
+            self.throttled += 1
+            return False
+        wait = max(self.per_second.reserve(), self.per_hour.reserve())
+        self.granted += 1
+        if wait > 0:
+            self.delayed += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund()
+                raise
+        return True
+
+    def refund(self):
+        """Give back budget granted to a request that was never sent."""
+        self.per_second.refund()
+        self.per_hour.refund()
+        self.granted -= 1
+
+    def remaining_hourly(self) -> Optional[int]:
+        if self.per_hour.unlimited:
+            return None
+        return max(0, int(self.per_hour.tokens))
+
+    def stats(self) -> dict:
+        return {
+            "remaining_hourly": self.remaining_hourly(),
+            "granted": self.granted,
+            "delayed": self.delayed,
+            "throttled": self.throttled,
+        }
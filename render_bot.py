@@ -1,15 +1,61 @@
 import os
+import asyncio
+import base64
+import hashlib
 import logging
-import requests
-from telegram import Update, InputFile
+import math
+import random
+import secrets
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultGif,
+    InlineQueryResultMpeg4Gif,
+    InputFile,
+    InputMediaAnimation,
+    InputMediaVideo,
+    Update,
+)
+from telegram.constants import ChatAction
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import (
     ApplicationBuilder,
+    CallbackQueryHandler,
     CommandHandler,
     MessageHandler,
     ContextTypes,
+    InlineQueryHandler,
     filters
 )
 
+from bloom import SeenFilter
+from cache import TTLCache
+from canonical import canonicalize
+from circuit_breaker import CircuitBreaker
+from contact_sheet import compose_sheet
+from giphy_client import GiphyClient, GIPHY_SEARCH_URL
+from local_library import LocalLibraryProvider, MetadataIndex
+from providers import GiphyProvider, HedgedSearch, TenorProvider, TENOR_SEARCH_URL
+from renditions import (
+    DEFAULT_QUALITY,
+    QUALITY_TARGETS,
+    original,
+    select_rendition,
+    select_video,
+    slim_gif,
+    thumbnail_url,
+)
+from ratelimit import QuotaManager
+from singleflight import SingleFlight
+from store import Store
+from update_processor import ChatOrderedUpdateProcessor
+
 # --------------------------------------
 # Logging Setup
 # --------------------------------------
@@ -18,6 +64,8 @@ logging.basicConfig(
     level=logging.INFO
 )
 logger = logging.getLogger(__name__)
+# httpx logs every request URL at INFO, and Giphy/Tenor URLs carry the API key.
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 # --------------------------------------
 # Environment Variables
@@ -26,6 +74,33 @@ BOT_TOKEN = os.getenv("TELEGRAM_TOKEN")
 if not BOT_TOKEN:
     raise ValueError("TELEGRAM_TOKEN environment variable not set!")
 
+# Point at a local fake Bot API server for testing, e.g. http://127.0.0.1:8081
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
+# --------------------------------------
+# Update Delivery (webhook / polling)
+# --------------------------------------
+# Render sets RENDER_EXTERNAL_URL and PORT for web services, so webhook mode
+# is picked automatically there; local runs without a public URL poll.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL") or os.getenv("RENDER_EXTERNAL_URL")
+BOT_MODE = os.getenv("BOT_MODE", "webhook" if WEBHOOK_URL else "polling").lower()
+if BOT_MODE not in ("webhook", "polling"):
+    raise ValueError(f"BOT_MODE must be 'webhook' or 'polling', got {BOT_MODE!r}")
+if BOT_MODE == "webhook" and not WEBHOOK_URL:
+    raise ValueError("BOT_MODE=webhook needs WEBHOOK_URL (or RENDER_EXTERNAL_URL) to be set!")
+
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("PORT", "10000"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram").strip("/")
+# Telegram echoes this back in X-Telegram-Bot-Api-Secret-Token; requests
+# without it are rejected. A random one is used if none is configured.
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))
+# Updates held in the per-chat queues at once; further ones still get a task
+# each from the Application and wait for a slot, so this is no memory bound.
+MAX_PENDING_UPDATES = int(os.getenv("MAX_PENDING_UPDATES", "1024"))
+
 # --------------------------------------
 # Simple Welcome Command
 # --------------------------------------
@@ -44,66 +119,913 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🛠 *Available Commands:*\n"
         "/start → Start the bot\n"
         "/help → Show this message\n"
-        "Just send any keyword, and I'll fetch a GIF for you!",
+        "/gifs cat, dog → One GIF for each keyword\n"
+        "/grid cat → Preview the top GIFs and pick one\n"
+        "/quality → Choose GIF quality for this chat\n"
+        "/stats → Show cache statistics\n"
+        "Just send any keyword, and I'll fetch a GIF for you!\n"
+        "Tap 🔁 or ➡️ under a GIF to swap it for another one.\n"
+        "In any chat, type `@botname keyword` to pick a GIF inline.",
         parse_mode="Markdown"
     )
 
+# --------------------------------------
+# Stats Command
+# --------------------------------------
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    cache_stats = search_cache.stats()
+    negative = negative_cache.stats()
+    harvest = harvest_index.stats()
+    upstream = giphy.stats()
+    processing = context.application.update_processor.stats()
+    remaining = upstream["remaining_hourly"]
+    lines = [
+        "📊 Search cache",
+        f"entries: {cache_stats['size']}/{cache_stats['maxsize']}",
+        f"hits: {cache_stats['hits']} · stale: {cache_stats['stale_hits']} · misses: {cache_stats['misses']}",
+        f"hit rate: {cache_stats['hit_rate']:.1%}",
+        f"no-result queries cached: {negative['size']}/{negative['maxsize']} · hits: {negative['hits']}",
+        f"coalesced: {inflight.shared} of {inflight.started + inflight.shared} fetches",
+        f"harvested: {harvest['gifs']}/{harvest['maxsize']} GIFs · answered {harvest['hits']} misses",
+        "",
+        "🌐 Giphy",
+        f"circuit {upstream['breaker']} · timeout {upstream['timeout_s']:.1f}s · rejected {upstream['rejected']}",
+        f"quota: {'unlimited' if remaining is None else remaining} left this hour "
+        f"· queued {upstream['delayed']} · throttled {upstream['throttled']}",
+    ]
+    for key in upstream["keys"]:
+        benched = f" · benched {key['benched_for']:.0f}s" if key["benched_for"] else ""
+        lines.append(
+            f"🔑 {key['key']}: {key['requests']} req · {key['errors']} err "
+            f"· {key['rejections']} refused{benched}"
+        )
+    if isinstance(search_provider, HedgedSearch):
+        hedging = search_provider.stats()
+        wins = " · ".join(f"{name} {count}" for name, count in hedging["wins"].items())
+        lines.append(f"hedged: {hedging['hedged']} · answered by {wins}")
+    seen = seen_filter.stats()
+    lines += [
+        "",
+        "👀 Seen filter",
+        f"chats: {seen['chats']}/{seen['max_chats']} · {seen['bytes'] / 1024:.0f}/{seen['max_bytes'] / 1024:.0f} KB "
+        f"· skipped {seen['skipped']} repeats",
+    ]
+    if local_library:
+        local = local_library.stats()
+        lines += [
+            "",
+            "📁 Local library",
+            f"gifs: {local['docs'] if local['docs'] is not None else 'not loaded'} "
+            f"· hits: {local['hits']} of {local['lookups']} searches",
+        ]
+    lines += [
+        "",
+        "⚙️ Updates",
+        f"active: {processing['active']} · queued: {processing['queued']} · chats: {processing['chats']}",
+        "",
+        "📎 file_id cache",
+        f"entries: {len(file_id_cache)}/{file_id_cache.maxsize}",
+        f"hits: {file_id_cache.hits} · misses: {file_id_cache.misses}",
+        "",
+        "💾 State store",
+        f"pending writes: {store.pending()} · flushes: {store.flushes}",
+    ]
+    await update.message.reply_text("\n".join(lines))
+
 # --------------------------------------
 # Fetch GIFs from Giphy API
 # --------------------------------------
+# One key, or a comma-separated pool in GIPHY_API_KEYS to go past one key's limits
 GIPHY_API_KEY = os.getenv("GIPHY_API_KEY")
-GIPHY_URL = "https://api.giphy.com/v1/gifs/search"
-
-def fetch_gif(query: str):
-    params = {
-        "api_key": GIPHY_API_KEY,
-        "q": query,
-        "limit": 1,
-        "rating": "pg-13"
-    }
-    try:
-        response = requests.get(GIPHY_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if data["data"]:
-            return data["data"][0]["images"]["original"]["url"]
+GIPHY_API_KEYS = [key.strip() for key in os.getenv("GIPHY_API_KEYS", GIPHY_API_KEY or "").split(",") if key.strip()]
+GIPHY_URL = os.getenv("GIPHY_URL", GIPHY_SEARCH_URL)
+GIPHY_TIMEOUT = float(os.getenv("GIPHY_TIMEOUT", "10"))
+GIPHY_MAX_CONNECTIONS = int(os.getenv("GIPHY_MAX_CONNECTIONS", "20"))
+GIPHY_MAX_CONCURRENCY = int(os.getenv("GIPHY_MAX_CONCURRENCY", "10"))
+# Timeouts adapt to observed latency between GIPHY_MIN_TIMEOUT and GIPHY_TIMEOUT
+GIPHY_MIN_TIMEOUT = float(os.getenv("GIPHY_MIN_TIMEOUT", "1"))
+# Circuit breaker: open after this many failures in a row (calls slower than
+# GIPHY_SLOW_CALL count as failures) and probe again after GIPHY_BREAKER_RESET.
+GIPHY_BREAKER_FAILURES = int(os.getenv("GIPHY_BREAKER_FAILURES", "5"))
+GIPHY_SLOW_CALL = float(os.getenv("GIPHY_SLOW_CALL", "3"))
+GIPHY_BREAKER_RESET = float(os.getenv("GIPHY_BREAKER_RESET", "30"))
+# Request budget (0 = unlimited): per second across all keys, per hour for
+# each key (beta keys allow 100). Searches queue for up to GIPHY_QUOTA_WAIT
+# seconds. Keys answered with 429/403 sit out GIPHY_KEY_COOLDOWN seconds.
+GIPHY_QUOTA_PER_SECOND = float(os.getenv("GIPHY_QUOTA_PER_SECOND", "0"))
+GIPHY_QUOTA_PER_HOUR = float(os.getenv("GIPHY_QUOTA_PER_HOUR", "0"))
+GIPHY_QUOTA_WAIT = float(os.getenv("GIPHY_QUOTA_WAIT", "2"))
+GIPHY_KEY_COOLDOWN = float(os.getenv("GIPHY_KEY_COOLDOWN", "60"))
+
+giphy = GiphyClient(
+    GIPHY_API_KEYS or [""],
+    search_url=GIPHY_URL,
+    timeout=GIPHY_TIMEOUT,
+    max_connections=GIPHY_MAX_CONNECTIONS,
+    max_keepalive=GIPHY_MAX_CONNECTIONS,
+    max_concurrency=GIPHY_MAX_CONCURRENCY,
+    min_timeout=GIPHY_MIN_TIMEOUT,
+    breaker=CircuitBreaker(
+        failure_threshold=GIPHY_BREAKER_FAILURES,
+        slow_call=GIPHY_SLOW_CALL,
+        reset_timeout=GIPHY_BREAKER_RESET,
+    ),
+    quota=QuotaManager(per_second=GIPHY_QUOTA_PER_SECOND),
+    quota_wait=GIPHY_QUOTA_WAIT,
+    key_quota_per_hour=GIPHY_QUOTA_PER_HOUR,
+    key_cooldown=GIPHY_KEY_COOLDOWN,
+)
+
+# --------------------------------------
+# Search Providers (Giphy first, others hedge)
+# --------------------------------------
+# With TENOR_API_KEY set, a search Giphy has not answered within
+# SEARCH_HEDGE_DELAY seconds is also sent to Tenor; the first answer wins.
+TENOR_API_KEY = os.getenv("TENOR_API_KEY")
+TENOR_URL = os.getenv("TENOR_URL", TENOR_SEARCH_URL)
+SEARCH_HEDGE_DELAY = float(os.getenv("SEARCH_HEDGE_DELAY", "1.0"))
+
+def build_search_provider():
+    primary = GiphyProvider(giphy)
+    secondaries = []
+    if TENOR_API_KEY:
+        secondaries.append(TenorProvider(TENOR_API_KEY, search_url=TENOR_URL, timeout=GIPHY_TIMEOUT))
+    if not secondaries:
+        return primary
+    return HedgedSearch(primary, secondaries, hedge_delay=SEARCH_HEDGE_DELAY)
+
+search_provider = build_search_provider()
+
+# --------------------------------------
+# Local GIF Library (offline, checked first)
+# --------------------------------------
+# A directory of .gif/.mp4 files, each optionally with a same-named .txt
+# sidecar (title on the first line, tags after it). Chat searches are answered
+# from it before Giphy is asked; with LOCAL_LIBRARY_MODE=only, never Giphy.
+LOCAL_GIF_DIR = os.getenv("LOCAL_GIF_DIR")
+LOCAL_LIBRARY_MODE = os.getenv("LOCAL_LIBRARY_MODE", "first").lower()
+# Where the search index is written; defaults to LOCAL_GIF_DIR/.gifindex
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH")
+
+local_library = LocalLibraryProvider(LOCAL_GIF_DIR, index_path=LOCAL_INDEX_PATH) if LOCAL_GIF_DIR else None
+
+# --------------------------------------
+# Search Result Cache
+# --------------------------------------
+GIPHY_RATING = os.getenv("GIPHY_RATING", "pg-13")
+# Fold plurals ("cats" -> "cat") into one cache entry and upstream query
+QUERY_STEMMING = os.getenv("QUERY_STEMMING", "false").lower() in ("1", "true", "yes")
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+# How long past SEARCH_CACHE_TTL a result may still be served while it is
+# refreshed in the background (or while Giphy is down).
+SEARCH_STALE_TTL = float(os.getenv("SEARCH_STALE_TTL", str(7 * 24 * 3600)))
+
+search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL, stale_ttl=SEARCH_STALE_TTL)
+
+# Queries Giphy had no results for (typos, gibberish) get their own, smaller
+# and shorter-lived cache so they never push real results out.
+NEGATIVE_CACHE_SIZE = int(os.getenv("NEGATIVE_CACHE_SIZE", "4096"))
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "600"))
+
+negative_cache = TTLCache(maxsize=NEGATIVE_CACHE_SIZE, ttl=NEGATIVE_CACHE_TTL)
+
+# Results fetched per upstream search. One request costs the same quota
+# whatever the page size, and the extra GIFs feed the harvest index.
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+# Giphy rejects queries longer than this; longer messages are cut to fit.
+MAX_QUERY_LENGTH = 50
+
+# --------------------------------------
+# Harvest Index (answer new queries from GIFs already seen)
+# --------------------------------------
+# Titles, slugs and tags of every GIF an upstream search returned are
+# indexed. A cache miss whose words all (HARVEST_MIN_OVERLAP) appear in at
+# least HARVEST_MIN_RESULTS indexed GIFs is answered from the index at once;
+# the query's real results are fetched in the background only if it is
+# searched again.
+# HARVEST_INDEX_SIZE=0 turns this off.
+HARVEST_INDEX_SIZE = int(os.getenv("HARVEST_INDEX_SIZE", "20000"))
+HARVEST_MIN_OVERLAP = float(os.getenv("HARVEST_MIN_OVERLAP", "1.0"))
+HARVEST_MIN_RESULTS = int(os.getenv("HARVEST_MIN_RESULTS", "3"))
+
+harvest_index = MetadataIndex(maxsize=HARVEST_INDEX_SIZE)
+
+def search_harvest(query: str) -> list:
+    if not HARVEST_INDEX_SIZE:
+        return []
+    return harvest_index.search(
+        query, limit=SEARCH_PAGE_SIZE, min_overlap=HARVEST_MIN_OVERLAP, min_results=HARVEST_MIN_RESULTS
+    )
+
+# --------------------------------------
+# Persistent State (survives restarts)
+# --------------------------------------
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "state.db")
+STORE_FLUSH_INTERVAL = float(os.getenv("STORE_FLUSH_INTERVAL", "2"))
+STORE_MAX_RESULTS = int(os.getenv("STORE_MAX_RESULTS", "50000"))
+STORE_MAX_FILE_IDS = int(os.getenv("STORE_MAX_FILE_IDS", "100000"))
+
+store = Store(
+    STATE_DB_PATH,
+    flush_interval=STORE_FLUSH_INTERVAL,
+    max_results=STORE_MAX_RESULTS,
+    max_file_ids=STORE_MAX_FILE_IDS,
+)
+
+# Shared by every upstream fetch; keys are namespaced by operation
+# ("search", ...) so unrelated work never coalesces.
+inflight = SingleFlight()
+
+def normalize_query(query: str) -> str:
+    return canonicalize(query, stem=QUERY_STEMMING)
+
+# --------------------------------------
+# Degraded Mode (answer from cache only)
+# --------------------------------------
+# While every provider's circuit breaker is open, cache misses fail fast and stale
+# results are served without a refresh attempt.
+background_tasks = set()
+
+def upstream_degraded() -> bool:
+    return not search_provider.available()
+
+def run_in_background(coroutine):
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def search_gifs(query: str, rating: str = GIPHY_RATING, page: int = 0):
+    key = (normalize_query(query), rating, page)
+    entry = search_cache.lookup(key)
+    if entry is not None:
+        data, fresh = entry
+        store.touch_result(key)
+        if not fresh and not upstream_degraded():
+            run_in_background(inflight.do(("search",) + key, fetch_and_cache, key, background=True))
+        return data
+    if negative_cache.get(key):
+        return []
+    if page == 0:
+        harvested = search_harvest(key[0])
+        if harvested:
+            # Answer right away and cache the answer as already stale: the
+            # query's own first page is only fetched if it is asked again,
+            # so a one-off query costs no upstream request at all.
+            if SEARCH_STALE_TTL > 0:
+                search_cache.set(key, harvested, ttl=0)
+            elif not upstream_degraded():
+                run_in_background(inflight.do(("search",) + key, fetch_and_cache, key, background=True))
+            return harvested
+    if upstream_degraded():
         return None
-    except Exception as e:
-        logger.error(f"Error fetching GIF: {e}")
+    return await inflight.do(("search",) + key, fetch_and_cache, key)
+
+async def fetch_and_cache(key: tuple, background: bool = False):
+    query, rating, page = key
+    data = await search_provider.search(
+        query[:MAX_QUERY_LENGTH], rating=rating, limit=SEARCH_PAGE_SIZE, offset=page * SEARCH_PAGE_SIZE, background=background
+    )
+    if data is None:
+        return data
+    data = [slim_gif(gif) for gif in data]
+    if HARVEST_INDEX_SIZE:
+        harvest_index.add(data)
+    if data:
+        search_cache.set(key, data)
+        store.put_result(key, data)
+    else:
+        negative_cache.set(key, True)
+    return data
+
+# --------------------------------------
+# Result Rotation (a different GIF each time)
+# --------------------------------------
+# Each chat walks the result pages of a query in its own shuffled order, one
+# GIF per request. Page n+1 is fetched only once page n has been used up;
+# after ROTATION_MAX_PAGES pages (or the last result) it starts over.
+ROTATION_MAX_PAGES = int(os.getenv("ROTATION_MAX_PAGES", "5"))
+ROTATION_CACHE_SIZE = int(os.getenv("ROTATION_CACHE_SIZE", "50000"))
+ROTATION_TTL = float(os.getenv("ROTATION_TTL", str(24 * 3600)))
+
+rotation = TTLCache(maxsize=ROTATION_CACHE_SIZE, ttl=ROTATION_TTL)
+
+class SearchUnavailable(Exception):
+    """The search could not be made (upstream down or over quota), as opposed
+    to a search that found nothing."""
+
+async def rotate(rotation_key: tuple, load_page, seen=lambda gif: False):
+    """Next GIF from the pages ``load_page(page)`` returns, or None if there are none.
+
+    Raises ``SearchUnavailable`` if the first page could not be loaded.
+    GIFs for which ``seen(gif)`` is true are skipped unless every GIF in the
+    rotation has been seen, in which case the first one is returned anyway.
+    """
+    cursor = rotation.get(rotation_key) or 0
+    fallback = None
+    # One full cycle, plus: short page -> empty next page -> wrap.
+    for _ in range(ROTATION_MAX_PAGES * SEARCH_PAGE_SIZE + 3):
+        page, index = divmod(cursor, SEARCH_PAGE_SIZE)
+        data = await load_page(page) if page < ROTATION_MAX_PAGES else None
+        if data and index < len(data):
+            order = list(range(len(data)))
+            random.Random(f"{rotation_key}:{page}").shuffle(order)
+            gif = data[order[index]]
+            cursor += 1
+            if not seen(gif):
+                rotation.set(rotation_key, cursor)
+                return gif
+            if fallback is None:
+                fallback = (gif, cursor)
+            continue
+        if data:
+            cursor = (page + 1) * SEARCH_PAGE_SIZE
+        elif page:
+            cursor = 0
+        elif data is None and fallback is None:
+            raise SearchUnavailable()
+        else:
+            break
+    if fallback is None:
         return None
+    rotation.set(rotation_key, fallback[1])
+    return fallback[0]
+
+# --------------------------------------
+# Already Seen Filter (per chat)
+# --------------------------------------
+# GIFs recently sent to a chat are skipped by the rotation. Each chat keeps
+# two Bloom filters sized for SEEN_FILTER_CAPACITY GIFs (240 bytes of bits
+# each at the default 1% false positives), about 1 KB per chat in all with
+# the Python objects around them; SEEN_FILTER_CHATS=0 turns this off.
+SEEN_FILTER_CHATS = int(os.getenv("SEEN_FILTER_CHATS", "10000"))
+SEEN_FILTER_CAPACITY = int(os.getenv("SEEN_FILTER_CAPACITY", "200"))
+SEEN_FILTER_ERROR_RATE = float(os.getenv("SEEN_FILTER_ERROR_RATE", "0.01"))
+
+seen_filter = SeenFilter(
+    max_chats=SEEN_FILTER_CHATS, capacity=SEEN_FILTER_CAPACITY, error_rate=SEEN_FILTER_ERROR_RATE
+)
+
+def seen_in(chat_id):
+    def seen(gif: dict) -> bool:
+        return seen_filter.skip(chat_id, gif["id"])
+    return seen
+
+async def fetch_gif(query: str, chat_id: Optional[int] = None):
+    """The next GIF for ``query`` in ``chat_id``'s rotation."""
+    rotation_key = (chat_id, normalize_query(query))
+    if local_library:
+        # The first page doubles as the "is it in the library?" check.
+        first = await local_library.search(query, limit=SEARCH_PAGE_SIZE)
+
+        async def local_page(page: int):
+            if page == 0:
+                return first
+            return await local_library.search(query, limit=SEARCH_PAGE_SIZE, offset=page * SEARCH_PAGE_SIZE)
+
+        if first or LOCAL_LIBRARY_MODE == "only":
+            return await rotate(("local",) + rotation_key, local_page, seen_in(chat_id))
+    return await rotate(rotation_key, lambda page: search_gifs(query, page=page), seen_in(chat_id))
+
+# Default rendition target; chats can override it with /quality
+GIF_QUALITY = os.getenv("GIF_QUALITY", DEFAULT_QUALITY)
+
+# --------------------------------------
+# Telegram file_id Cache
+# --------------------------------------
+FILE_ID_CACHE_SIZE = int(os.getenv("FILE_ID_CACHE_SIZE", "20000"))
+
+# file_ids stay valid indefinitely; only the size bound evicts them.
+file_id_cache = TTLCache(maxsize=FILE_ID_CACHE_SIZE, ttl=math.inf)
+
+def remember_file_id(key: str, file_id: str):
+    file_id_cache.set(key, file_id)
+    store.put_file_id(key, file_id)
+
+def forget_file_id(key: str):
+    file_id_cache.pop(key)
+    store.delete_file_id(key)
+
+async def deliver_gif(gif: dict, quality: str, send):
+    """Send ``gif`` with ``send(media)``, reusing Telegram's file_id when we have one."""
+    rendition = select_rendition(gif, quality)
+    key = f"{gif['id']}:{rendition.key}"
+    file_id = file_id_cache.get(key)
+    if file_id:
+        store.put_file_id(key, file_id)
+        try:
+            return await send(file_id)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                raise
+            logger.warning(f"Cached file_id for {key} rejected: {e}")
+            forget_file_id(key)
+
+    # Local library files are uploaded; everything else is fetched by Telegram.
+    sent = await send(Path(rendition.url) if gif.get("local") else rendition.url)
+    media = sent.animation or sent.document or sent.video
+    if media:
+        remember_file_id(key, media.file_id)
+    return sent
+
+async def send_gif(message, gif: dict, quality: str = GIF_QUALITY, reply_markup=None):
+    """Reply to ``message`` with ``gif``."""
+    return await deliver_gif(
+        gif, quality, lambda media: message.reply_animation(animation=media, reply_markup=reply_markup)
+    )
+
+# --------------------------------------
+# Quality Command
+# --------------------------------------
+async def quality_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    current = context.chat_data.get("quality", GIF_QUALITY)
+    if not context.args:
+        await update.message.reply_text(
+            f"🎚 GIF quality for this chat: *{current}*\n"
+            f"Change it with /quality {' | '.join(QUALITY_TARGETS)}",
+            parse_mode="Markdown"
+        )
+        return
+
+    quality = context.args[0].lower()
+    if quality not in QUALITY_TARGETS:
+        await update.message.reply_text(f"⚠️ Unknown quality. Pick one of: {', '.join(QUALITY_TARGETS)}")
+        return
+    context.chat_data["quality"] = quality
+    await update.message.reply_text(f"✅ GIF quality set to *{quality}*", parse_mode="Markdown")
+
+# --------------------------------------
+# Chat Action While Searching
+# --------------------------------------
+# Only shown when a reply takes longer than CHAT_ACTION_DELAY, so cached
+# answers cost a single Bot API call. Telegram clears an action after ~5 s.
+CHAT_ACTION_DELAY = float(os.getenv("CHAT_ACTION_DELAY", "0.3"))
+CHAT_ACTION_INTERVAL = 4.5
+
+@asynccontextmanager
+async def chat_action(chat, action: str = ChatAction.UPLOAD_VIDEO):
+    async def keep_alive():
+        await asyncio.sleep(CHAT_ACTION_DELAY)
+        while True:
+            try:
+                await chat.send_action(action)
+            except TelegramError as e:
+                logger.warning(f"Could not send chat action: {e}")
+                return
+            await asyncio.sleep(CHAT_ACTION_INTERVAL)
+
+    task = asyncio.create_task(keep_alive())
+    try:
+        yield
+    finally:
+        task.cancel()
 
 # --------------------------------------
 # Handle User Messages (GIF Search)
 # --------------------------------------
+BUSY_REPLY = "⏳ GIF search is busy right now, please try again in a moment."
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.message.text.strip()
     if not query:
         await update.message.reply_text("⚠️ Please send me a keyword!")
         return
 
-    await update.message.reply_text(f"🔍 Searching GIF for: *{query}* ...", parse_mode="Markdown")
+    async with chat_action(update.effective_chat):
+        try:
+            gif = await fetch_gif(query, update.effective_chat.id)
+        except SearchUnavailable:
+            await update.message.reply_text(BUSY_REPLY)
+            return
+        if gif:
+            await send_gif(
+                update.message, gif, context.chat_data.get("quality", GIF_QUALITY), gif_buttons(query)
+            )
+            seen_filter.add(update.effective_chat.id, gif["id"])
+    if not gif:
+        await update.message.reply_text("😕 Sorry, I couldn't find a GIF for that.")
 
-    gif_url = fetch_gif(query)
-    if gif_url:
-        await update.message.reply_animation(animation=gif_url)
-    else:
+# --------------------------------------
+# "Another" / "Next" Buttons
+# --------------------------------------
+# Buttons carry "gif:<action>:<token>" (callback data is capped at 64 bytes);
+# the token maps back to the query for BUTTON_TTL seconds. "Next" advances
+# the chat's rotation, "another" jumps to a random GIF already cached for the
+# query. Either way the GIF is swapped in place with editMessageMedia.
+BUTTON_CACHE_SIZE = int(os.getenv("BUTTON_CACHE_SIZE", "50000"))
+BUTTON_TTL = float(os.getenv("BUTTON_TTL", str(24 * 3600)))
+
+button_queries = TTLCache(maxsize=BUTTON_CACHE_SIZE, ttl=BUTTON_TTL)
+
+def button_token(query: str) -> str:
+    """Short token that callback data can carry in place of ``query``."""
+    query = normalize_query(query)
+    token = base64.urlsafe_b64encode(hashlib.blake2b(query.encode("utf-8"), digest_size=6).digest()).decode()
+    button_queries.set(token, query)
+    return token
+
+def gif_buttons(query: str) -> InlineKeyboardMarkup:
+    token = button_token(query)
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("🔁 another", callback_data=f"gif:a:{token}"),
+        InlineKeyboardButton("➡️ next", callback_data=f"gif:n:{token}"),
+    ]])
+
+async def another_gif(query: str, chat_id: int):
+    """A random GIF the chat has not seen from what is already cached for ``query``."""
+    pool = []
+    if local_library:
+        pool = await local_library.search(query, limit=SEARCH_PAGE_SIZE * ROTATION_MAX_PAGES)
+    if not pool:
+        for page in range(ROTATION_MAX_PAGES):
+            entry = search_cache.lookup((normalize_query(query), GIPHY_RATING, page))
+            if entry is None:
+                break
+            pool += entry[0]
+    unseen = [gif for gif in pool if not seen_filter.seen(chat_id, gif["id"])]
+    if unseen or pool:
+        return random.choice(unseen or pool)
+    # Nothing cached any more (evicted or expired): fall back to the rotation.
+    return await fetch_gif(query, chat_id)
+
+async def gif_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    callback = update.callback_query
+    _, action, token = callback.data.split(":", 2)
+    message = callback.message
+    query = button_queries.get(token)
+    if query is None and message and message.reply_to_message:
+        query = message.reply_to_message.text
+    if not query or not message:
+        await callback.answer("⌛ This button has expired, send the keyword again.")
+        return
+
+    chat_id = message.chat_id
+    try:
+        gif = await (another_gif(query, chat_id) if action == "a" else fetch_gif(query, chat_id))
+    except SearchUnavailable:
+        await callback.answer(BUSY_REPLY)
+        return
+    if not gif:
+        await callback.answer("😕 No more GIFs for that.")
+        return
+    await callback.answer()
+    markup = gif_buttons(query)
+    try:
+        await deliver_gif(
+            gif,
+            context.chat_data.get("quality", GIF_QUALITY),
+            lambda media: message.edit_media(InputMediaAnimation(media), reply_markup=markup),
+        )
+    except BadRequest as e:
+        # e.g. the same GIF came round again ("message is not modified")
+        logger.info(f"Could not swap GIF: {e}")
+        return
+    seen_filter.add(chat_id, gif["id"])
+
+# --------------------------------------
+# Batch Command (/gifs cat, dog, party)
+# --------------------------------------
+# Every keyword goes through the same rotation, cache and coalescing path as
+# a chat message, concurrently; the Giphy client's quota and concurrency
+# limits still apply. The answers come back as one media group of MP4s.
+GIFS_MAX_KEYWORDS = 10  # Telegram's media group limit
+
+async def gifs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    keywords = {}
+    for keyword in " ".join(context.args).split(","):
+        if normalize_query(keyword):
+            keywords.setdefault(normalize_query(keyword), keyword.strip())
+    keywords = list(keywords.values())
+    if not keywords:
+        await update.message.reply_text("⚠️ Usage: /gifs cat, dog, party")
+        return
+    if len(keywords) > GIFS_MAX_KEYWORDS:
+        await update.message.reply_text(f"⚠️ Up to {GIFS_MAX_KEYWORDS} keywords at a time, please.")
+        return
+
+    chat_id = update.effective_chat.id
+    quality = context.chat_data.get("quality", GIF_QUALITY)
+    async with chat_action(update.effective_chat):
+        gifs = await asyncio.gather(
+            *(fetch_gif(keyword, chat_id) for keyword in keywords), return_exceptions=True
+        )
+        for gif in gifs:
+            if isinstance(gif, Exception) and not isinstance(gif, SearchUnavailable):
+                raise gif
+        found = [(keyword, gif) for keyword, gif in zip(keywords, gifs) if isinstance(gif, dict)]
+        videos = [(keyword, gif, select_video(gif, quality)) for keyword, gif in found]
+        group = [item for item in videos if item[2]]
+        if len(group) >= 2:
+            await send_gif_group(update.message, group)
+        # Lone results and GIF-only assets cannot go in the group.
+        for keyword, gif, video in videos:
+            if len(group) < 2 or not video:
+                await send_gif(update.message, gif, quality)
+        for _, gif in found:
+            seen_filter.add(chat_id, gif["id"])
+
+    missing = [keyword for keyword, gif in zip(keywords, gifs) if gif is None]
+    if missing:
+        await update.message.reply_text(f"😕 No GIFs for: {', '.join(missing)}")
+    busy = [keyword for keyword, gif in zip(keywords, gifs) if isinstance(gif, SearchUnavailable)]
+    if busy:
+        await update.message.reply_text(f"⏳ GIF search is busy, try again in a moment for: {', '.join(busy)}")
+
+async def send_gif_group(message, group: list):
+    """Reply with one media group of ``(caption, gif, mp4 rendition)`` items."""
+    # Videos get their own file_ids; an animation's cannot be sent as a video.
+    keys = [f"{gif['id']}:{video.key}:video" for _, gif, video in group]
+
+    def media(use_file_ids: bool) -> list:
+        items = []
+        for (caption, gif, video), key in zip(group, keys):
+            file_id = file_id_cache.get(key) if use_file_ids else None
+            source = file_id or (Path(video.url) if gif.get("local") else video.url)
+            items.append(InputMediaVideo(source, caption=caption))
+        return items
+
+    try:
+        sent = await message.reply_media_group(media(use_file_ids=True))
+    except BadRequest as e:
+        # One stale file_id fails the whole group; retry by URL.
+        logger.warning(f"Media group rejected, resending by URL: {e}")
+        for key in keys:
+            if key in file_id_cache:
+                forget_file_id(key)
+        sent = await message.reply_media_group(media(use_file_ids=False))
+    for reply, key in zip(sent, keys):
+        video = reply.video or reply.animation or reply.document
+        if video:
+            remember_file_id(key, video.file_id)
+    return sent
+
+# --------------------------------------
+# Preview Grid (/grid cat)
+# --------------------------------------
+# The top GRID_SIZE results as one numbered contact sheet; tapping a number
+# sends that GIF. Thumbnail downloads and sheet composition go through the
+# shared SingleFlight, so concurrent /grid calls for a query build one sheet.
+# Sheets (and their photo file_id once sent) are cached per query; the GIFs
+# behind each sheet's buttons are kept as long as the buttons work, so a tap
+# sends the GIF that sheet showed even after the sheet itself is gone.
+GRID_SIZE = int(os.getenv("GRID_SIZE", "9"))
+GRID_COLUMNS = int(os.getenv("GRID_COLUMNS", "3"))
+GRID_TILE = int(os.getenv("GRID_TILE", "200"))
+GRID_FORMAT = os.getenv("GRID_FORMAT", "JPEG").upper()
+GRID_CACHE_SIZE = int(os.getenv("GRID_CACHE_SIZE", "256"))
+GRID_CACHE_TTL = float(os.getenv("GRID_CACHE_TTL", str(SEARCH_CACHE_TTL)))
+GRID_BUTTON_CACHE_SIZE = int(os.getenv("GRID_BUTTON_CACHE_SIZE", "4096"))
+THUMBNAIL_MAX_BYTES = 2_000_000
+
+grid_cache = TTLCache(maxsize=GRID_CACHE_SIZE, ttl=GRID_CACHE_TTL)
+grid_selections = TTLCache(maxsize=GRID_BUTTON_CACHE_SIZE, ttl=BUTTON_TTL)
+thumbnail_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(5.0),
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+)
+
+def read_local_thumbnail(path: str) -> bytes:
+    # The first frame sits at the start of a GIF, so a capped read is enough.
+    with open(path, "rb") as f:
+        return f.read(THUMBNAIL_MAX_BYTES)
+
+async def download_thumbnail(gif: dict) -> Optional[bytes]:
+    try:
+        if gif.get("local"):
+            return await asyncio.to_thread(read_local_thumbnail, original(gif).url)
+        response = await thumbnail_client.get(thumbnail_url(gif))
+        response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Could not fetch thumbnail for {gif.get('id')}: {e!r}")
+        return None
+    return response.content if len(response.content) <= THUMBNAIL_MAX_BYTES else None
+
+async def grid_results(query: str, rating: str = GIPHY_RATING) -> Optional[list]:
+    """The GIFs a grid for ``query`` shows, from the same sources as chat replies.
+
+    Local MP4s are left out: Pillow cannot decode a frame from them.
+    """
+    if local_library:
+        local = await local_library.search(query, limit=SEARCH_PAGE_SIZE)
+        if local or LOCAL_LIBRARY_MODE == "only":
+            return [gif for gif in local or [] if original(gif).format == "gif"][:GRID_SIZE]
+    data = await search_gifs(query, rating)
+    return data[:GRID_SIZE] if data is not None else None
+
+async def build_grid(key: tuple) -> Optional[dict]:
+    query, rating = key
+    gifs = await grid_results(query, rating)
+    if gifs is None:
+        raise SearchUnavailable()
+    if not gifs:
+        return None
+    thumbnails = await asyncio.gather(*(
+        inflight.do(("thumbnail", gif["id"]), download_thumbnail, gif) for gif in gifs
+    ))
+    sheet = await asyncio.to_thread(
+        compose_sheet, thumbnails, columns=GRID_COLUMNS, tile=GRID_TILE, format=GRID_FORMAT
+    )
+    grid = {"gifs": gifs, "sheet": sheet, "file_id": None}
+    grid_cache.set(key, grid)
+    return grid
+
+def grid_buttons(query: str, gifs: list) -> InlineKeyboardMarkup:
+    query = normalize_query(query)
+    selection = "\n".join([query] + [gif["id"] for gif in gifs])
+    token = base64.urlsafe_b64encode(hashlib.blake2b(selection.encode("utf-8"), digest_size=6).digest()).decode()
+    grid_selections.set(token, (query, gifs))
+    numbers = [
+        InlineKeyboardButton(str(i + 1), callback_data=f"grid:{i}:{token}") for i in range(len(gifs))
+    ]
+    return InlineKeyboardMarkup([numbers[i:i + GRID_COLUMNS] for i in range(0, len(gifs), GRID_COLUMNS)])
+
+async def grid_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = " ".join(context.args)
+    if not normalize_query(query):
+        await update.message.reply_text("⚠️ Usage: /grid cat")
+        return
+
+    key = (normalize_query(query), GIPHY_RATING)
+    async with chat_action(update.effective_chat, ChatAction.UPLOAD_PHOTO):
+        try:
+            grid = grid_cache.get(key) or await inflight.do(("grid",) + key, build_grid, key)
+        except SearchUnavailable:
+            await update.message.reply_text(BUSY_REPLY)
+            return
+        if grid:
+            markup = grid_buttons(query, grid["gifs"])
+            caption = "Tap a number to get that GIF"
+            sheet = InputFile(grid["sheet"], filename=f"grid.{GRID_FORMAT.lower()}")
+            try:
+                sent = await update.message.reply_photo(grid["file_id"] or sheet, caption=caption, reply_markup=markup)
+            except BadRequest as e:
+                if not grid["file_id"]:
+                    raise
+                logger.warning(f"Cached grid file_id rejected: {e}")
+                sent = await update.message.reply_photo(sheet, caption=caption, reply_markup=markup)
+            if sent.photo:
+                grid["file_id"] = sent.photo[-1].file_id
+    if not grid:
         await update.message.reply_text("😕 Sorry, I couldn't find a GIF for that.")
 
+async def grid_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    callback = update.callback_query
+    _, index, token = callback.data.split(":", 2)
+    selection = grid_selections.get(token)
+    message = callback.message
+    if not selection or not message:
+        await callback.answer("⌛ This grid has expired, send /grid again.")
+        return
+
+    query, gifs = selection
+    if int(index) >= len(gifs):
+        await callback.answer("😕 That GIF is no longer available.")
+        return
+    gif = gifs[int(index)]
+    await callback.answer()
+    await send_gif(message, gif, context.chat_data.get("quality", GIF_QUALITY), gif_buttons(query))
+    seen_filter.add(message.chat_id, gif["id"])
+
+# --------------------------------------
+# Inline Mode (@bot keyword)
+# --------------------------------------
+INLINE_PAGE_SIZE = int(os.getenv("INLINE_PAGE_SIZE", "25"))
+INLINE_CACHE_SIZE = int(os.getenv("INLINE_CACHE_SIZE", "1024"))
+INLINE_CACHE_TTL = float(os.getenv("INLINE_CACHE_TTL", "900"))
+# How long Telegram's servers may cache an answer for the same query
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))
+GIPHY_MAX_OFFSET = 4999
+
+inline_cache = TTLCache(maxsize=INLINE_CACHE_SIZE, ttl=INLINE_CACHE_TTL)
+
+def build_inline_result(gif: dict, quality: str):
+    rendition = select_rendition(gif, quality)
+    if rendition.format == "mp4":
+        return InlineQueryResultMpeg4Gif(
+            id=gif["id"],
+            mpeg4_url=rendition.url,
+            thumbnail_url=thumbnail_url(gif),
+            mpeg4_width=rendition.width or None,
+            mpeg4_height=rendition.height or None,
+            title=gif.get("title") or None,
+        )
+    return InlineQueryResultGif(
+        id=gif["id"],
+        gif_url=rendition.url,
+        thumbnail_url=thumbnail_url(gif),
+        gif_width=rendition.width or None,
+        gif_height=rendition.height or None,
+        title=gif.get("title") or None,
+    )
+
+async def fetch_inline_page(key: tuple):
+    query, rating, offset = key
+    data = await search_provider.search(query[:MAX_QUERY_LENGTH], rating=rating, limit=INLINE_PAGE_SIZE, offset=offset)
+    if data is None:
+        return None
+    if HARVEST_INDEX_SIZE:
+        harvest_index.add([slim_gif(gif) for gif in data])
+    results = [build_inline_result(gif, GIF_QUALITY) for gif in data]
+    next_offset = offset + len(data)
+    has_more = len(data) == INLINE_PAGE_SIZE and next_offset <= GIPHY_MAX_OFFSET
+    page = (results, str(next_offset) if has_more else "")
+    inline_cache.set(key, page)
+    return page
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = normalize_query(update.inline_query.query)
+    if not query:
+        await update.inline_query.answer([], cache_time=INLINE_CACHE_TIME)
+        return
+
+    try:
+        offset = int(update.inline_query.offset or 0)
+    except ValueError:
+        offset = 0
+    key = (query, GIPHY_RATING, offset)
+    page = inline_cache.get(key)
+    if page is None:
+        page = await inflight.do(("inline",) + key, fetch_inline_page, key)
+    if page is None:
+        await update.inline_query.answer([], cache_time=0)
+        return
+
+    results, next_offset = page
+    await update.inline_query.answer(results, cache_time=INLINE_CACHE_TIME, next_offset=next_offset)
+
 # --------------------------------------
 # Error Handler
 # --------------------------------------
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
     logger.error(f"Update {update} caused error {context.error}")
 
+# --------------------------------------
+# Lifecycle Hooks
+# --------------------------------------
+async def warm_caches():
+    now = time.time()
+    for key, data, stored_at in reversed(await store.recent_results(SEARCH_CACHE_SIZE)):
+        remaining = SEARCH_CACHE_TTL - (now - stored_at)
+        if remaining + SEARCH_STALE_TTL > 0:
+            search_cache.set(key, data, ttl=remaining)
+        if HARVEST_INDEX_SIZE:
+            harvest_index.add(data)
+    for key, file_id in reversed(await store.recent_file_ids(FILE_ID_CACHE_SIZE)):
+        file_id_cache.set(key, file_id)
+    logger.info(
+        f"Warmed caches: {len(search_cache)} results, {len(file_id_cache)} file_ids, "
+        f"{len(harvest_index)} harvested GIFs"
+    )
+
+async def post_init(app):
+    await store.open()
+    await warm_caches()
+    app.bot_data["store_writer"] = asyncio.create_task(store.run())
+
+async def post_shutdown(app):
+    writer = app.bot_data.pop("store_writer", None)
+    if writer:
+        writer.cancel()
+    await store.close()
+    await search_provider.aclose()
+    await thumbnail_client.aclose()
+    if local_library:
+        await local_library.aclose()
+
 # --------------------------------------
 # Main App
 # --------------------------------------
 def main():
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    update_processor = ChatOrderedUpdateProcessor(
+        max_workers=CONCURRENT_UPDATES,
+        max_pending=MAX_PENDING_UPDATES,
+    )
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .base_url(f"{TELEGRAM_API_URL}/bot")
+        .base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+        .concurrent_updates(update_processor)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Commands
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_command))
+    app.add_handler(CommandHandler("stats", stats_command))
+    app.add_handler(CommandHandler("quality", quality_command))
+    app.add_handler(CommandHandler("gifs", gifs_command))
+    app.add_handler(CommandHandler("grid", grid_command))
+
+    # Inline Mode
+    app.add_handler(InlineQueryHandler(inline_query))
+
+    # "Another" / "Next" and grid buttons
+    app.add_handler(CallbackQueryHandler(gif_button, pattern=r"^gif:"))
+    app.add_handler(CallbackQueryHandler(grid_button, pattern=r"^grid:"))
 
     # Message Handler (GIF Fetch)
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
@@ -111,8 +1033,19 @@ def main():
     # Errors
     app.add_error_handler(error_handler)
 
-    logger.info("🚀 Bot started successfully!")
-    app.run_polling()
+    logger.info(f"🚀 Bot started successfully in {BOT_MODE} mode!")
+    if BOT_MODE == "webhook":
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=Update.ALL_TYPES,
+        )
+    else:
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 # --------------------------------------
 # Entry Point
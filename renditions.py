@@ -0,0 +1,163 @@
+from typing import NamedTuple, Optional
+
+# --------------------------------------
+# Quality Targets
+# --------------------------------------
+# min_width: narrowest acceptable rendition.
+# min_frame_ratio: share of the original's frames a rendition must keep
+#   (Giphy's "downsampled" renditions drop most frames).
+# max_bytes: hard cap; Telegram fetches files by URL only up to 20 MB.
+class QualityTarget(NamedTuple):
+    min_width: int
+    min_frame_ratio: float
+    max_bytes: int
+
+
+QUALITY_TARGETS = {
+    "low": QualityTarget(min_width=100, min_frame_ratio=0.0, max_bytes=2_000_000),
+    "medium": QualityTarget(min_width=200, min_frame_ratio=0.5, max_bytes=8_000_000),
+    "high": QualityTarget(min_width=400, min_frame_ratio=0.9, max_bytes=20_000_000),
+}
+DEFAULT_QUALITY = "medium"
+
+TELEGRAM_URL_LIMIT = 20_000_000
+
+
+# --------------------------------------
+# Rendition Selection
+# --------------------------------------
+class Rendition(NamedTuple):
+    name: str
+    format: str
+    url: str
+    width: int
+    height: int
+    size: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}.{self.format}"
+
+
+def _int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_animated(name: str) -> bool:
+    """False for still frames (``*_still``), truncated previews (``preview*``)
+    and the 15-second ``looping`` clip."""
+    return not (name.endswith("_still") or name.startswith("preview") or name == "looping")
+
+
+def candidates(gif: dict) -> list:
+    """Every (rendition, format) pair in a Giphy GIF object that is a full
+    animation and has a URL and a size."""
+    found = []
+    for name, image in gif.get("images", {}).items():
+        if not is_animated(name):
+            continue
+        width, height = _int(image.get("width")), _int(image.get("height"))
+        if image.get("mp4") and _int(image.get("mp4_size")):
+            found.append(Rendition(name, "mp4", image["mp4"], width, height, _int(image["mp4_size"])))
+        if image.get("url") and _int(image.get("size")):
+            found.append(Rendition(name, "gif", image["url"], width, height, _int(image["size"])))
+    return found
+
+
+def original(gif: dict) -> Rendition:
+    image = gif["images"]["original"]
+    if not image.get("url") and image.get("mp4"):
+        # MP4-only sources (e.g. local files) have no GIF original.
+        return Rendition(
+            "original", "mp4", image["mp4"],
+            _int(image.get("width")), _int(image.get("height")), _int(image.get("mp4_size")),
+        )
+    return Rendition(
+        "original", "gif", image["url"],
+        _int(image.get("width")), _int(image.get("height")), _int(image.get("size")),
+    )
+
+
+def select_rendition(gif: dict, quality: str = DEFAULT_QUALITY) -> Rendition:
+    """Pick the smallest rendition of ``gif`` that meets ``quality``.
+
+    MP4 wins ties and is tried first when nothing meets the target, since it
+    is typically several times smaller than the equivalent GIF.
+    """
+    target = QUALITY_TARGETS.get(quality, QUALITY_TARGETS[DEFAULT_QUALITY])
+    images = gif.get("images", {})
+    original_frames = _int(images.get("original", {}).get("frames"))
+
+    def frames_ok(rendition: Rendition) -> bool:
+        frames = _int(images[rendition.name].get("frames"))
+        if not frames or not original_frames:
+            # Giphy omits frames on some renditions; only downsampled ones drop frames.
+            return "downsampled" not in rendition.name or target.min_frame_ratio == 0
+        return frames >= original_frames * target.min_frame_ratio
+
+    usable = [c for c in candidates(gif) if c.size <= min(target.max_bytes, TELEGRAM_URL_LIMIT)]
+    meeting = [c for c in usable if c.width >= target.min_width and frames_ok(c)]
+    if meeting:
+        return min(meeting, key=lambda c: (c.size, c.format != "mp4"))
+    if usable:
+        # Nothing meets the target: take the widest that fits, preferring MP4.
+        return max(usable, key=lambda c: (c.width, c.format == "mp4", -c.size))
+    return original(gif)
+
+
+def select_video(gif: dict, quality: str = DEFAULT_QUALITY) -> Optional[Rendition]:
+    """Like ``select_rendition`` but MP4 only (media groups cannot hold
+    animations); None if ``gif`` has no MP4 rendition."""
+    images = {
+        name: {field: value for field, value in image.items() if field not in ("url", "size")}
+        for name, image in gif.get("images", {}).items()
+        if image.get("mp4")
+    }
+    if not images:
+        return None
+    if "original" not in images:
+        images["original"] = max(images.values(), key=lambda image: _int(image.get("width")))
+    return select_rendition({**gif, "images": images}, quality)
+
+
+def rendition_size(gif: dict, quality: Optional[str]) -> int:
+    """Bytes Telegram would fetch for ``gif`` at ``quality`` (None = original GIF)."""
+    if quality is None:
+        return original(gif).size
+    return select_rendition(gif, quality).size
+
+
+# --------------------------------------
+# Thumbnails
+# --------------------------------------
+THUMBNAIL_RENDITIONS = ("fixed_width_small_still", "fixed_width_still", "preview_gif", "fixed_width_small")
+
+
+def thumbnail_url(gif: dict) -> str:
+    images = gif.get("images", {})
+    for name in THUMBNAIL_RENDITIONS:
+        url = images.get(name, {}).get("url")
+        if url:
+            return url
+    return original(gif).url
+
+
+# --------------------------------------
+# Trimming Cached Results
+# --------------------------------------
+# Everything rendition selection, thumbnails and the metadata index read.
+GIF_FIELDS = ("id", "title", "slug", "tags")
+IMAGE_FIELDS = ("width", "height", "size", "url", "mp4", "mp4_size", "frames")
+
+
+def slim_gif(gif: dict) -> dict:
+    """``gif`` without analytics, user and webp fields (most of a Giphy object)."""
+    slim = {field: gif[field] for field in GIF_FIELDS if field in gif}
+    slim["images"] = {
+        name: {field: image[field] for field in IMAGE_FIELDS if field in image}
+        for name, image in gif.get("images", {}).items()
+    }
+    return slim
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at);
+CREATE TABLE IF NOT EXISTS file_ids (
+    key TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS file_ids_used_at ON file_ids (used_at);
+"""
+
+
+# --------------------------------------
+# Persistent State Store (SQLite, WAL)
+# --------------------------------------
+class Store:
+    """On-disk home for search results and Telegram file_ids.
+
+    Writes are buffered in memory and flushed in batches by ``run`` on a
+    single worker thread, so callers on the event loop never touch the disk.
+    Later writes to the same key replace earlier ones in the buffer. Times
+    are wall-clock (``time.time``) so they stay meaningful across restarts.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 2.0,
+        max_results: int = 50000,
+        max_file_ids: int = 100000,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_results = max_results
+        self.max_file_ids = max_file_ids
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._results: "dict[str, tuple]" = {}
+        self._result_touches: "dict[str, float]" = {}
+        self._file_ids: "dict[str, Optional[tuple]]" = {}
+        self.flushes = 0
+        self.rows_written = 0
+
+    @staticmethod
+    def encode_key(key: Any) -> str:
+        return json.dumps(key, separators=(",", ":"), ensure_ascii=False)
+
+    @staticmethod
+    def decode_key(raw: str) -> Any:
+        key = json.loads(raw)
+        return tuple(key) if isinstance(key, list) else key
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ---- lifecycle ----
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        self._conn = conn
+
+    async def open(self):
+        await self._call(self._open)
+
+    async def run(self):
+        """Flush buffered writes every ``flush_interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Error flushing state store: {e}")
+
+    async def close(self):
+        if self._conn is None:
+            return
+        try:
+            await self.flush()
+            await self._call(self._prune)
+        finally:
+            await self._call(self._conn.close)
+            self._conn = None
+            self._executor.shutdown(wait=True)
+
+    # ---- write-behind buffer ----
+
+    def put_result(self, key: Any, value: Any, stored_at: Optional[float] = None):
+        now = time.time()
+        self._results[self.encode_key(key)] = (json.dumps(value), stored_at or now, now)
+
+    def touch_result(self, key: Any):
+        self._result_touches[self.encode_key(key)] = time.time()
+
+    def put_file_id(self, key: str, file_id: str):
+        self._file_ids[key] = (file_id, time.time())
+
+    def delete_file_id(self, key: str):
+        self._file_ids[key] = None
+
+    def pending(self) -> int:
+        return len(self._results) + len(self._result_touches) + len(self._file_ids)
+
+    async def flush(self):
+        if not self.pending() or self._conn is None:
+            return
+        batch = (self._results, self._result_touches, self._file_ids)
+        self._results, self._result_touches, self._file_ids = {}, {}, {}
+        await self._call(self._write, *batch)
+        self.flushes += 1
+        if self.flushes % 100 == 0:
+            await self._call(self._prune)
+
+    def _write(self, results: dict, touches: dict, file_ids: dict):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, value, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                [(key, value, stored_at, used_at) for key, (value, stored_at, used_at) in results.items()],
+            )
+            self._conn.executemany(
+                "UPDATE results SET used_at = ? WHERE key = ?",
+                [(used_at, key) for key, used_at in touches.items() if key not in results],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_ids (key, file_id, used_at) VALUES (?, ?, ?)",
+                [(key, entry[0], entry[1]) for key, entry in file_ids.items() if entry is not None],
+            )
+            self._conn.executemany(
+                "DELETE FROM file_ids WHERE key = ?",
+                [(key,) for key, entry in file_ids.items() if entry is None],
+            )
+        self.rows_written += len(results) + len(touches) + len(file_ids)
+
+    def _prune(self):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM results WHERE key NOT IN "
+                "(SELECT key FROM results ORDER BY used_at DESC LIMIT ?)",
+                (self.max_results,),
+            )
+            self._conn.execute(
+                "DELETE FROM file_ids WHERE key NOT IN "
+                "(SELECT key FROM file_ids ORDER BY used_at DESC LIMIT ?)",
+                (self.max_file_ids,),
+            )
+
+    # ---- startup warming ----
+
+    def _recent_results(self, limit: int) -> list:
+        rows = self._conn.execute(
+            "SELECT key, value, stored_at FROM results ORDER BY used_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [(self.decode_key(key), json.loads(value), stored_at) for key, value, stored_at in rows]
+
+    def _recent_file_ids(self, limit: int) -> list:
+        return self._conn.execute(
+            "SELECT key, file_id FROM file_ids ORDER BY used_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    async def recent_results(self, limit: int) -> list:
+        """Most recently used ``(key, value, stored_at)`` rows, newest first."""
+        return await self._call(self._recent_results, limit)
+
+    async def recent_file_ids(self, limit: int) -> list:
+        """Most recently used ``(key, file_id)`` rows, newest first."""
+        return await self._call(self._recent_file_ids, limit)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------
+# Per-chat Ordered, Fair Update Processor
+# --------------------------------------
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently while keeping each chat's updates in order.
+
+    At most ``max_workers`` updates run at once and at most one per chat.
+    Chats with queued work take turns round-robin, so a busy group chat
+    gets one worker slot per turn and cannot starve quieter chats.
+
+    ``max_pending`` bounds the updates held here, queued plus running. It
+    is not backpressure: the Application starts a task for every update it
+    fetches, and updates beyond the bound wait as tasks on the base class's
+    semaphore, so it caps this processor's queues rather than memory use.
+    """
+
+    def __init__(self, max_workers: int, max_pending: Optional[int] = None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        super().__init__(max_pending or max_workers * 32)
+        self.max_workers = max_workers
+        self._queues: "dict[Hashable, deque]" = {}
+        self._ready: "deque[Hashable]" = deque()
+        self._active = 0
+        self._tasks: "set[asyncio.Task]" = set()
+
+    @staticmethod
+    def ordering_key(update: object) -> Hashable:
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return ("chat", update.effective_chat.id)
+            if update.effective_user:
+                return ("user", update.effective_user.id)
+            return ("update", update.update_id)
+        return ("object", id(update))
+
+    async def do_process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        key = self.ordering_key(update)
+        done = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(key)
+        if queue is None:
+            # Chat is idle: make it schedulable. Otherwise it is either running
+            # or already waiting in _ready and will pick this update up in turn.
+            queue = self._queues[key] = deque()
+            self._ready.append(key)
+        queue.append((coroutine, done))
+        self._dispatch()
+        await done
+
+    def _dispatch(self):
+        while self._active < self.max_workers and self._ready:
+            key = self._ready.popleft()
+            coroutine, done = self._queues[key].popleft()
+            self._active += 1
+            task = asyncio.create_task(self._run(key, coroutine, done))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, coroutine: "Awaitable[Any]", done: asyncio.Future):
+        try:
+            await coroutine
+        except BaseException as e:
+            if not done.done():
+                done.set_exception(e)
+        else:
+            if not done.done():
+                done.set_result(None)
+        finally:
+            self._active -= 1
+            if self._queues[key]:
+                self._ready.append(key)
+            else:
+                del self._queues[key]
+            self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "chats": len(self._queues),
+        }
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        # Finishing a task dispatches the next queued update, so drain until
+        # nothing is left running.
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)